@@ -1,16 +1,62 @@
 import hashlib
+import hmac
+import os
+import time
 import jwt
 from datetime import datetime, timedelta
+from cache import token_cache
+from concurrency import run_hashing
 from config import settings
 from typing import Optional
 
+SCRYPT_PREFIX = "scrypt"
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    # scrypt needs roughly 128 * r * (n + p) bytes; leave headroom above that
+    maxmem = 128 * r * (n + p + 2) + 1024 * 1024
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=32)
+
 def hash_password(password: str) -> str:
-    """Hash password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash password using salted scrypt with the configured cost"""
+    n, r, p = settings.password_scrypt_n, settings.password_scrypt_r, settings.password_scrypt_p
+    salt = os.urandom(16)
+    digest = _scrypt(password, salt, n, r, p)
+    return f"{SCRYPT_PREFIX}${n}${r}${p}${salt.hex()}${digest.hex()}"
 
 def verify_password(password: str, password_hash: str) -> bool:
-    """Verify password against hash"""
-    return hash_password(password) == password_hash
+    """Verify password against a scrypt hash or a legacy unsalted SHA-256 hash"""
+    if password_hash.startswith(SCRYPT_PREFIX + "$"):
+        try:
+            _, n, r, p, salt, expected = password_hash.split("$")
+            digest = _scrypt(password, bytes.fromhex(salt), int(n), int(r), int(p))
+        except ValueError:
+            return False
+        return hmac.compare_digest(digest.hex(), expected)
+    
+    legacy = hashlib.sha256(password.encode()).hexdigest()
+    return hmac.compare_digest(legacy, password_hash)
+
+def dummy_password_hash() -> str:
+    """A scrypt hash at the current cost that no password matches.
+
+    Verified against for unknown usernames so a failed login costs the
+    same KDF work whether or not the account exists.
+    """
+    n, r, p = settings.password_scrypt_n, settings.password_scrypt_r, settings.password_scrypt_p
+    return f"{SCRYPT_PREFIX}${n}${r}${p}${'00' * 16}${'00' * 32}"
+
+def needs_rehash(password_hash: str) -> bool:
+    """True for legacy hashes and scrypt hashes made with other cost settings"""
+    current = f"{SCRYPT_PREFIX}${settings.password_scrypt_n}${settings.password_scrypt_r}${settings.password_scrypt_p}$"
+    return not password_hash.startswith(current)
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the password hashing pool"""
+    return await run_hashing(hash_password, password)
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    """verify_password on the password hashing pool"""
+    return await run_hashing(verify_password, password, password_hash)
 
 def create_access_token(user_id: int, username: str) -> str:
     """Create JWT access token"""
@@ -24,11 +70,21 @@ def create_access_token(user_id: int, username: str) -> str:
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 def decode_token(token: str) -> Optional[dict]:
-    """Decode and verify JWT token"""
+    """Decode and verify JWT token, reusing earlier verifications of the same token"""
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    
+    # Cache only until the token itself expires
+    ttl = min(settings.token_cache_ttl_seconds, payload.get('exp', 0) - time.time())
+    if ttl > 0:
+        token_cache.set(digest, payload, ttl=ttl, size=len(token) + len(digest))
+    return payload
@@ -0,0 +1,12 @@
+"""In-process load tests for the FastAPI backend.
+
+Run from the backend directory:
+
+    python -m benchmarks run --users 50 --goals 8 --years 2
+    python -m benchmarks compare results/old.json results/new.json
+    python -m benchmarks analytics --goals 50 200 800
+
+`run` seeds a synthetic database in a scratch directory, drives `main.app`
+through an ASGI client and writes latency/throughput results as JSON.
+`analytics` times the yearly stats computation as a user's goal count grows.
+"""
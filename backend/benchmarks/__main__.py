@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], requests: int, errors: int, elapsed: float) -> Dict:
+    latencies = sorted(latencies)
+    to_ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "operations": len(latencies),
+        "requests": requests,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "ops_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "requests_per_s": round(requests / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": to_ms(percentile(latencies, 0.50)),
+            "p95": to_ms(percentile(latencies, 0.95)),
+            "p99": to_ms(percentile(latencies, 0.99)),
+            "mean": to_ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+            "max": to_ms(latencies[-1]) if latencies else 0.0,
+        },
+    }
+
+
+async def run_scenario(client, name: str, dataset: Dict, tokens: Dict[int, str], args) -> Dict:
+    """Run `args.operations` actions of one scenario from `args.concurrency` workers"""
+    from benchmarks.scenarios import SCENARIOS
+
+    build = SCENARIOS[name]
+    latencies: List[float] = []
+    counts = {"requests": 0, "errors": 0}
+    remaining = {"warmup": args.warmup, "measured": args.operations}
+
+    async def one_action(rng: random.Random, measure: bool):
+        user = rng.choice(dataset["users"])
+        headers = {"Authorization": f"Bearer {tokens[user['id']]}"}
+        requests = build(dataset, user, rng)
+        started = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.request(method, path, json=body, headers=headers) for method, path, body in requests
+        ])
+        if measure:
+            latencies.append(time.perf_counter() - started)
+            counts["requests"] += len(responses)
+            counts["errors"] += sum(1 for response in responses if response.status_code >= 400)
+
+    async def worker(number: int, phase: str):
+        rng = random.Random(f"{args.seed}:{name}:{phase}:{number}")
+        while remaining[phase] > 0:
+            remaining[phase] -= 1
+            await one_action(rng, measure=phase == "measured")
+
+    await asyncio.gather(*[worker(number, "warmup") for number in range(args.concurrency)])
+    started = time.perf_counter()
+    await asyncio.gather(*[worker(number, "measured") for number in range(args.concurrency)])
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, counts["requests"], counts["errors"], elapsed)
+
+
+async def run_benchmarks(args, dataset: Dict) -> Dict:
+    import httpx
+    import main
+    from auth import create_access_token
+    from cache import response_cache
+
+    tokens = {user["id"]: create_access_token(user["id"], user["username"]) for user in dataset["users"]}
+    await main.startup_event()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            results = {}
+            for name in args.scenarios:
+                response_cache.clear()
+                results[name] = await run_scenario(client, name, dataset, tokens, args)
+                print(format_result(name, results[name]))
+            return results
+    finally:
+        await main.shutdown_event()
+
+
+def format_result(name: str, result: Dict) -> str:
+    latency = result["latency_ms"]
+    return (f"  {name:<14} {result['ops_per_s']:>9,.1f} ops/s  "
+            f"p50 {latency['p50']:>8.2f} ms  p95 {latency['p95']:>8.2f} ms  p99 {latency['p99']:>8.2f} ms  "
+            f"errors {result['errors']}")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> int:
+    from benchmarks.scenarios import SCENARIOS
+    import database
+    from config import settings
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+        return 2
+    settings.cache_enabled = not args.no_cache
+
+    with tempfile.TemporaryDirectory() as scratch:
+        database.DATABASE = os.path.join(scratch, "benchmark.db")
+        started = time.perf_counter()
+        from benchmarks.seed import seed_database
+        dataset = seed_database(args.users, args.goals, args.years, seed=args.seed)
+        print(f"Seeded {len(dataset['users'])} users, {dataset['checkins']:,} check-ins "
+              f"in {time.perf_counter() - started:.1f}s")
+        results = asyncio.run(run_benchmarks(args, dataset))
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "dataset": {
+            "users": args.users,
+            "goals_per_user": args.goals,
+            "years": args.years,
+            "seed": args.seed,
+            "checkins": dataset["checkins"],
+        },
+        "config": {
+            "operations": args.operations,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "cache_enabled": settings.cache_enabled,
+        },
+        "scenarios": results,
+    }
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{commit or 'nogit'}.json")
+    with open(output, "w") as stream:
+        json.dump(report, stream, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+
+def analytics(args) -> int:
+    """Time yearly stats for one user at each goal count, cache disabled.
+
+    Each size gets its own scratch database holding two years of data and
+    the last complete year is measured, split into loading the matrix and
+    the full computation.
+    """
+    import database
+    from benchmarks.seed import seed_database
+    from config import settings
+    from services import analytics as year_stats
+
+    settings.cache_enabled = False
+    year = date.today().year - 1
+    results = []
+    print(f"Year {year}, median of {args.repeat} runs")
+    print(f"  {'goals':>6} {'check-ins':>10} {'load ms':>9} {'total ms':>9} {'us/goal':>8}")
+    for goals in args.goals:
+        with tempfile.TemporaryDirectory() as scratch:
+            database.DATABASE = os.path.join(scratch, "analytics.db")
+            try:
+                dataset = seed_database(1, goals, 2, seed=args.seed)
+                user_id = dataset["users"][0]["id"]
+                load_times, total_times = [], []
+                for attempt in range(args.repeat + 1):
+                    started = time.perf_counter()
+                    year_stats.load_year(year, user_id)
+                    loaded = time.perf_counter()
+                    year_stats.get_year_stats(year, user_id)
+                    finished = time.perf_counter()
+                    if attempt:
+                        load_times.append(loaded - started)
+                        total_times.append(finished - loaded)
+            finally:
+                database.close_write_queue()
+                database.close_pool()
+        load_ms = percentile(sorted(load_times), 0.5) * 1000
+        total_ms = percentile(sorted(total_times), 0.5) * 1000
+        results.append({"goals": goals, "checkins": dataset["checkins"],
+                        "load_ms": round(load_ms, 3), "total_ms": round(total_ms, 3)})
+        print(f"  {goals:>6} {dataset['checkins']:>10,} {load_ms:>9.2f} {total_ms:>9.2f} "
+              f"{total_ms * 1000 / goals:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w") as stream:
+            json.dump({"commit": git_commit(), "year": year, "repeat": args.repeat, "sizes": results},
+                      stream, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+def compare(args) -> int:
+    """Print per-scenario throughput and latency changes between two result files"""
+    with open(args.baseline) as stream:
+        baseline = json.load(stream)
+    with open(args.candidate) as stream:
+        candidate = json.load(stream)
+
+    def change(old: float, new: float) -> str:
+        return f"{(new - old) / old * 100:+6.1f}%" if old else "   n/a"
+
+    print(f"{baseline.get('commit')} -> {candidate.get('commit')}")
+    for name, new in candidate["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            print(f"  {name:<14} (new)")
+            continue
+        parts = [f"ops/s {change(old['ops_per_s'], new['ops_per_s'])}"]
+        for key in ("p50", "p95", "p99"):
+            parts.append(f"{key} {change(old['latency_ms'][key], new['latency_ms'][key])}")
+        print(f"  {name:<14} " + "  ".join(parts))
+    return 0
+
+
+def main() -> int:
+    from benchmarks.scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Backend load tests")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Seed a scratch database and run scenarios")
+    run_parser.add_argument("--users", type=int, default=50)
+    run_parser.add_argument("--goals", type=int, default=8, help="Goals per user")
+    run_parser.add_argument("--years", type=int, default=1, help="Years of check-in history")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--operations", type=int, default=500, help="Measured actions per scenario")
+    run_parser.add_argument("--warmup", type=int, default=50, help="Unmeasured actions per scenario")
+    run_parser.add_argument("--concurrency", type=int, default=16, help="Concurrent simulated clients")
+    run_parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), metavar="NAME")
+    run_parser.add_argument("--no-cache", action="store_true", help="Disable the progress response cache")
+    run_parser.add_argument("--output", help="Result file (default: benchmarks/results/<time>-<commit>.json)")
+
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+
+    analytics_parser = commands.add_parser("analytics", help="Time yearly stats as goal counts grow")
+    analytics_parser.add_argument("--goals", type=int, nargs="+", default=[10, 50, 100, 200, 400, 800])
+    analytics_parser.add_argument("--repeat", type=int, default=20, help="Measured runs per size")
+    analytics_parser.add_argument("--seed", type=int, default=0)
+    analytics_parser.add_argument("--output", help="Optional JSON result file")
+
+    args = parser.parse_args()
+    return {"run": run, "compare": compare, "analytics": analytics}[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, BACKEND_DIR)
+    sys.exit(main())
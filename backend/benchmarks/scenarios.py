@@ -0,0 +1,54 @@
+"""Benchmark scenarios: each returns the requests making up one user action"""
+import random
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Tuple
+
+# (method, path, json body or None)
+Request = Tuple[str, str, object]
+
+
+def dashboard(dataset: Dict, user: Dict, rng: random.Random) -> List[Request]:
+    """Everything the app loads for the home screen, fetched in parallel"""
+    return [
+        ("GET", "/categories", None),
+        ("GET", "/goals", None),
+        ("GET", "/progress/by-frequency", None),
+        ("GET", "/checkins/today", None),
+    ]
+
+
+def checkin_burst(dataset: Dict, user: Dict, rng: random.Random) -> List[Request]:
+    """A single check-in for today; run with high concurrency"""
+    body = {"goal_id": rng.choice(user["goal_ids"]), "date": date.today().isoformat(), "value": 1, "note": "bench"}
+    return [("POST", "/checkins", body)]
+
+
+def year_calendar(dataset: Dict, user: Dict, rng: random.Random) -> List[Request]:
+    """Calendar heatmap for one of the seeded years"""
+    start_year = date.fromisoformat(dataset["start_date"]).year
+    end_year = date.fromisoformat(dataset["end_date"]).year
+    return [("GET", f"/progress/calendar/{rng.randint(start_year, end_year)}", None)]
+
+
+def day_details(dataset: Dict, user: Dict, rng: random.Random) -> List[Request]:
+    """Opening one day from the calendar"""
+    start = date.fromisoformat(dataset["start_date"])
+    span = (date.fromisoformat(dataset["end_date"]) - start).days
+    day = start + timedelta(days=rng.randint(0, span))
+    return [("GET", f"/progress/day/{day.isoformat()}", None)]
+
+
+def year_stats(dataset: Dict, user: Dict, rng: random.Random) -> List[Request]:
+    """Yearly statistics for one of the seeded years"""
+    start_year = date.fromisoformat(dataset["start_date"]).year
+    end_year = date.fromisoformat(dataset["end_date"]).year
+    return [("GET", f"/progress/stats/{rng.randint(start_year, end_year)}", None)]
+
+
+SCENARIOS: Dict[str, Callable[[Dict, Dict, random.Random], List[Request]]] = {
+    "dashboard": dashboard,
+    "checkin_burst": checkin_burst,
+    "year_calendar": year_calendar,
+    "day_details": day_details,
+    "year_stats": year_stats,
+}
@@ -0,0 +1,28 @@
+"""Benchmark databases built with the synthetic data generator"""
+from datetime import date
+from typing import Dict
+import database
+import datagen
+
+
+def seed_database(users: int, goals_per_user: int, years: int, seed: int = 0) -> Dict:
+    """Fill the current database and describe what was created.
+
+    Check-ins cover January 1st `years - 1` years ago through today.
+    Returns {'users': [{'id', 'username', 'goal_ids'}], 'start_date', 'end_date', 'checkins'}.
+    """
+    summary = datagen.generate(users, (goals_per_user, goals_per_user), years, seed, end_date=date.today())
+
+    seeded_users = {}
+    with database.get_db() as conn:
+        for row in conn.execute("SELECT id, username FROM users ORDER BY id"):
+            seeded_users[row["id"]] = {"id": row["id"], "username": row["username"], "goal_ids": []}
+        for row in conn.execute("SELECT id, user_id FROM goals ORDER BY id"):
+            seeded_users[row["user_id"]]["goal_ids"].append(row["id"])
+
+    return {
+        "users": list(seeded_users.values()),
+        "start_date": summary["start_date"],
+        "end_date": summary["end_date"],
+        "checkins": summary["checkins"],
+    }
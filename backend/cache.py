@@ -0,0 +1,189 @@
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Hashable, Optional
+from config import settings
+
+_MISSING = object()
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a JSON-like value in bytes"""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 1024
+
+
+class LRUCache:
+    """Thread-safe LRU cache with per-entry TTL and an approximate byte budget.
+
+    Entries can carry a tag (e.g. a user id) so every entry for that tag can
+    be dropped at once with `invalidate_tag`. Each invalidation (and `clear`)
+    also bumps a generation, so `get_or_compute` does not store a value that
+    was computed while the tag was being invalidated.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024,
+                 ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()  # key -> (value, expires_at, size, tag)
+        self._tags = {}  # tag -> set of keys
+        self._generations = {}  # tag -> invalidation count
+        self._epoch = 0  # clear() count
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0,
+                       'expirations': 0, 'invalidations': 0, 'stale_discards': 0}
+
+    def _remove(self, key: Hashable):
+        _, _, size, tag = self._entries.pop(key)
+        self._bytes -= size
+        if tag is not None:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[0]
+
+    def _generation(self, tag: Optional[Hashable]) -> tuple:
+        return self._epoch, self._generations.get(tag, 0)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            tag: Optional[Hashable] = None, size: Optional[int] = None,
+            generation: Optional[tuple] = None):
+        """Store `value`; skipped if `generation` no longer matches `tag`'s"""
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation(tag):
+                self._stats['stale_discards'] += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at, size, tag)
+            self._bytes += size
+            if tag is not None:
+                self._tags.setdefault(tag, set()).add(key)
+            self._stats['sets'] += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       tag: Optional[Hashable] = None) -> Any:
+        # Taken before computing: a write invalidating `tag` meanwhile may
+        # have committed after compute() read the database
+        with self._lock:
+            generation = self._generation(tag)
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, tag=tag, generation=generation)
+        return value
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_tag(self, tag: Hashable):
+        """Drop every entry stored with this tag"""
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+            self._epoch += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
+
+
+response_cache = LRUCache(
+    max_entries=settings.cache_max_entries,
+    max_bytes=settings.cache_max_bytes,
+    ttl_seconds=settings.cache_ttl_seconds,
+)
+
+token_cache = LRUCache(
+    max_entries=settings.token_cache_max_entries,
+    ttl_seconds=settings.token_cache_ttl_seconds,
+)
+
+principal_cache = LRUCache(
+    max_entries=settings.principal_cache_max_entries,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+)
+
+
+def cached_per_user(namespace: str):
+    """Cache a read keyed by its arguments, tagged by the `user_id` argument.
+
+    Keys include today's date because progress windows move at midnight,
+    and the user's data version so a write made through another worker
+    process is never answered from this process's copy. Repository writes
+    also call `invalidate_user` to free the user's entries right away.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not settings.cache_enabled:
+                return fn(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            user_id = bound.arguments['user_id']
+            # Imported here: database imports this module
+            from repositories.data_version_repository import DataVersionRepository
+            version = DataVersionRepository.get(user_id)
+            key = (namespace, tuple(bound.arguments.items()), date.today().isoformat(), version)
+            return response_cache.get_or_compute(key, lambda: fn(*args, **kwargs), tag=user_id)
+
+        return wrapper
+    return decorator
+
+
+def invalidate_user(user_id: int):
+    """Forget every cached response for a user after one of their writes"""
+    response_cache.invalidate_tag(user_id)
@@ -0,0 +1,67 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from config import settings
+from profiling import profiled
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executor_lock = threading.Lock()
+
+
+def _get_executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    executor = _executors.get(name)
+    if executor is None:
+        with _executor_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+                _executors[name] = executor
+    return executor
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Return the bounded thread pool that runs blocking database work"""
+    return _get_executor("db-worker", settings.db_executor_workers)
+
+
+def get_hash_executor() -> ThreadPoolExecutor:
+    """Return the small thread pool reserved for password KDF work"""
+    return _get_executor("password-hash", settings.password_hash_workers)
+
+
+def shutdown_executors():
+    """Wait for running work and release all worker threads"""
+    with _executor_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+
+async def _run_in(executor: ThreadPoolExecutor, func: Callable[..., Any], *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, profiled(func), *args, **kwargs)
+    return await loop.run_in_executor(executor, call)
+
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking repository or service call off the event loop.
+
+    The call runs on the dedicated DB thread pool, so a slow query only
+    occupies one worker thread instead of stalling every request on the
+    loop. Context variables are carried over to the worker thread.
+    """
+    return await _run_in(get_db_executor(), func, *args, **kwargs)
+
+
+async def run_hashing(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run CPU-heavy password hashing on its own pool.
+
+    Keeping KDF work off the DB pool means a login storm queues here
+    instead of starving database requests.
+    """
+    return await _run_in(get_hash_executor(), func, *args, **kwargs)
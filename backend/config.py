@@ -11,6 +11,76 @@ class Settings(BaseSettings):
     jwt_secret: str = "secret-key" #To-do: change this
     jwt_algorithm: str = "HS256"
     jwt_expiration_hours: int = 24 * 7  # 7 days
+
+    # Password hashing (scrypt); hashes with other parameters are upgraded on login
+    password_scrypt_n: int = 2 ** 14
+    password_scrypt_r: int = 8
+    password_scrypt_p: int = 1
+    password_hash_workers: int = 2  # max concurrent KDF computations
+
+    # SQLite connection pool
+    db_pool_size: int = 5  # idle connections kept open for reuse
+    db_pool_max_overflow: int = 10  # extra connections allowed under load
+    db_pool_timeout: float = 30.0  # seconds to wait for a free connection
+    db_pool_recycle_seconds: int = 3600  # reopen connections older than this
+    db_pool_pre_ping: bool = False  # health check connections on checkout (rarely needed for a local file)
+
+    # SQLite storage tuning (applied to every connection)
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"  # safe with WAL, fsyncs only at checkpoints
+    sqlite_cache_size_kib: int = 20000  # page cache per connection
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_busy_timeout: float = 5.0  # seconds to wait on a locked database
+
+    # Write queue: all writes go through one writer thread with group commit
+    db_write_queue_enabled: bool = True
+    db_write_batch_size: int = 64  # max queued writes committed together
+    db_write_timeout: float = 30.0  # seconds a caller waits for its write
+
+    # Thread pool for blocking database work; keep it within the connection
+    # pool capacity (db_pool_size + db_pool_max_overflow)
+    db_executor_workers: int = 8
+
+    # Instrumentation: request/SQL metrics served at /metrics
+    metrics_enabled: bool = True
+    slow_query_ms: float = 100.0  # log SQL statements slower than this
+    request_query_warn_threshold: int = 50  # log requests running more statements (N+1)
+
+    # Per-request profiling, triggered by X-Profile plus X-Profile-Token
+    profiling_enabled: bool = False
+    profiling_token: str = ""  # required; profiling stays off while empty
+    profiling_default_mode: str = "sample"  # cprofile, sample or both
+    profiling_sample_interval: float = 0.002  # seconds between stack samples
+    profiling_output_dir: str = "profiles"
+
+    # Migration backfills run in small transactions after startup
+    migration_backfill_chunk_size: int = 200  # users per backfill transaction
+    migration_backfill_pause: float = 0.05  # seconds yielded to app writes between chunks
+
+    # First day of the week for weekly goals: 0 = Monday (ISO) ... 6 = Sunday
+    week_start: int = 0
+
+    # Page size for check-in listings when a cursor is sent without a limit
+    page_size_default: int = 100
+
+    # Rows fetched per round trip when streaming exports
+    export_chunk_size: int = 1000
+
+    # Rows per transaction when importing historical check-ins
+    import_chunk_size: int = 5000
+
+    # In-process response cache for progress endpoints
+    cache_enabled: bool = True
+    cache_max_entries: int = 2048
+    cache_max_bytes: int = 32 * 1024 * 1024  # approximate, measured as JSON size
+    cache_ttl_seconds: float = 60.0
+
+    # Verified JWT payloads and user principals, keyed by token digest / user id
+    token_cache_max_entries: int = 10000
+    token_cache_ttl_seconds: float = 300.0  # never beyond the token's own exp
+    principal_cache_max_entries: int = 10000
+    principal_cache_ttl_seconds: float = 300.0
     
     class Config:
         env_file = ".env"
@@ -1,84 +1,488 @@
+import contextvars
 import os
+import queue
 import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
 from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional
+import migrations
+from cache import response_cache
+from config import settings
+from metrics import InstrumentedConnection
 
 DATABASE = "365withme.db"
 
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+_TEMP_STORES = {"DEFAULT", "FILE", "MEMORY"}
+
+
+def _pragma_choice(name: str, value: str, allowed: set) -> str:
+    value = value.upper()
+    if value not in allowed:
+        raise ValueError(f"Unsupported {name} setting: {value}")
+    return value
+
+
+def apply_pragmas(conn: sqlite3.Connection):
+    """Apply the storage tuning from Settings to a fresh connection"""
+    journal_mode = _pragma_choice("sqlite_journal_mode", settings.sqlite_journal_mode, _JOURNAL_MODES)
+    synchronous = _pragma_choice("sqlite_synchronous", settings.sqlite_synchronous, _SYNCHRONOUS_MODES)
+    temp_store = _pragma_choice("sqlite_temp_store", settings.sqlite_temp_store, _TEMP_STORES)
+
+    conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+    conn.execute(f"PRAGMA synchronous = {synchronous}")
+    conn.execute(f"PRAGMA cache_size = {-int(settings.sqlite_cache_size_kib)}")
+    conn.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+    conn.execute(f"PRAGMA temp_store = {temp_store}")
+
+
+_connection_hooks: List[Callable[[sqlite3.Connection], None]] = []
+
+
+def add_connection_hook(hook: Callable[[sqlite3.Connection], None]):
+    """Call `hook(conn)` on every connection opened from now on"""
+    _connection_hooks.append(hook)
+
+
+def remove_connection_hook(hook: Callable[[sqlite3.Connection], None]):
+    _connection_hooks.remove(hook)
+
+
+def connect(database: Optional[str] = None, **kwargs) -> sqlite3.Connection:
+    """Open a tuned connection; pooled and writer connections both use this"""
+    if settings.metrics_enabled:
+        kwargs.setdefault("factory", InstrumentedConnection)
+    conn = sqlite3.connect(
+        database or DATABASE,
+        timeout=settings.sqlite_busy_timeout,
+        check_same_thread=False,
+        **kwargs
+    )
+    conn.row_factory = sqlite3.Row
+    apply_pragmas(conn)
+    for hook in _connection_hooks:
+        hook(conn)
+    return conn
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of long-lived SQLite connections.
+
+    Up to `size` idle connections are kept open and handed out LIFO so the
+    most recently used (and most cache-warm) connection is reused first.
+    Under load up to `max_overflow` extra connections are opened and closed
+    again when returned. Nested `get_db()` calls simply take a second
+    connection, so they never deadlock while overflow is available.
+    """
+
+    def __init__(self, database: str, size: int = 5, max_overflow: int = 10,
+                 timeout: float = 30.0, recycle_seconds: int = 3600,
+                 pre_ping: bool = False):
+        self.database = database
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle_seconds = recycle_seconds
+        self.pre_ping = pre_ping
+
+        self._idle = deque()
+        self._created_at = {}
+        self._open = 0
+        self._closed = False
+        self._available = threading.Condition(threading.Lock())
+        self._stats = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'reused': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'recycled': 0,
+            'health_check_failures': 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = connect(self.database)
+        self._created_at[conn] = time.monotonic()
+        self._stats['connections_created'] += 1
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection):
+        self._created_at.pop(conn, None)
+        self._stats['connections_closed'] += 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        age = time.monotonic() - self._created_at.get(conn, 0)
+        if self.recycle_seconds and age > self.recycle_seconds:
+            self._stats['recycled'] += 1
+            return False
+        if self.pre_ping:
+            try:
+                # A plain cursor, so pings don't show up in request query counts
+                sqlite3.Cursor(conn).execute("SELECT 1").fetchone()
+            except sqlite3.Error:
+                self._stats['health_check_failures'] += 1
+                return False
+        return True
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check out a connection, opening one if the pool has capacity"""
+        deadline = time.monotonic() + self.timeout
+        conn = None
+        with self._available:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            self._stats['checkouts'] += 1
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    self._stats['reused'] += 1
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {self.timeout}s"
+                    )
+                self._stats['waits'] += 1
+                self._available.wait(remaining)
+
+        if conn is not None and not self._is_healthy(conn):
+            self._discard(conn)
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._available:
+                    self._open -= 1
+                    self._available.notify()
+                raise
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection, rolling back anything left uncommitted"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            reusable = True
+        except sqlite3.Error:
+            reusable = False
+
+        with self._available:
+            if reusable and not self._closed and len(self._idle) < self.size:
+                self._idle.append(conn)
+            else:
+                self._open -= 1
+                self._discard(conn)
+            self._available.notify()
+
+    def close(self):
+        """Close idle connections; checked-out ones close when released"""
+        with self._available:
+            self._closed = True
+            while self._idle:
+                self._open -= 1
+                self._discard(self._idle.pop())
+            self._available.notify_all()
+
+    def stats(self) -> dict:
+        with self._available:
+            return {
+                **self._stats,
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+            }
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    DATABASE,
+                    size=settings.db_pool_size,
+                    max_overflow=settings.db_pool_max_overflow,
+                    timeout=settings.db_pool_timeout,
+                    recycle_seconds=settings.db_pool_recycle_seconds,
+                    pre_ping=settings.db_pool_pre_ping,
+                )
+    return _pool
+
+
+def close_pool():
+    """Close all pooled connections; the next get_db() opens a fresh pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
 @contextmanager
 def get_db():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
+    pool = get_pool()
+    conn = pool.acquire()
     try:
         yield conn
     finally:
-        conn.close()
+        pool.release(conn)
+
+
+class WriteQueue:
+    """Serializes writes through a single writer thread with group commit.
+
+    Callers submit a function taking a connection; it must not commit. The
+    writer drains up to `batch_size` queued jobs, runs each inside its own
+    SAVEPOINT (so one failing job does not undo the others) and commits the
+    whole group with a single COMMIT, i.e. one fsync for a burst of writes.
+    """
+
+    def __init__(self, database: str, batch_size: int = 64, timeout: float = 30.0):
+        self.database = database
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {'writes': 0, 'failed_writes': 0, 'commits': 0, 'max_batch': 0}
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="sqlite-writer", daemon=True
+                    )
+                    self._thread.start()
+
+    def submit(self, fn: Callable[..., Any], *args) -> Any:
+        """Queue a write and block until its group has been committed"""
+        if self._thread is not None and threading.current_thread() is self._thread:
+            raise RuntimeError("Nested write submitted from the writer thread")
+        self._ensure_started()
+        future = Future()
+        # Run the job in the caller's context so its SQL counts towards the request
+        self._queue.put((contextvars.copy_context(), fn, args, future))
+        return future.result(timeout=self.timeout)
 
-def init_db():
-    """Initialize database with tables and default data"""
+    def _run(self):
+        conn = connect(self.database, isolation_level=None)
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    return
+                batch = [job]
+                while len(batch) < self.batch_size:
+                    try:
+                        job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        self._queue.put(None)
+                        break
+                    batch.append(job)
+                self._commit_batch(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: list):
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for context, fn, args, future in batch:
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    result = context.run(fn, conn, *args)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_job")
+                    conn.execute("RELEASE write_job")
+                    outcomes.append((future, None, e))
+                else:
+                    conn.execute("RELEASE write_job")
+                    outcomes.append((future, result, None))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for *_, future in batch:
+                future.set_exception(e)
+            self._stats['failed_writes'] += len(batch)
+            return
+
+        self._stats['commits'] += 1
+        self._stats['max_batch'] = max(self._stats['max_batch'], len(batch))
+        for future, result, error in outcomes:
+            if error is not None:
+                self._stats['failed_writes'] += 1
+                future.set_exception(error)
+            else:
+                self._stats['writes'] += 1
+                future.set_result(result)
+
+    def close(self):
+        """Finish queued writes and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(self.timeout)
+
+    def stats(self) -> dict:
+        return {**self._stats, 'queued': self._queue.qsize()}
+
+
+_write_queue: Optional[WriteQueue] = None
+
+
+def get_write_queue() -> WriteQueue:
+    """Return the process-wide write queue, creating it on first use"""
+    global _write_queue
+    if _write_queue is None:
+        with _pool_lock:
+            if _write_queue is None:
+                _write_queue = WriteQueue(
+                    DATABASE,
+                    batch_size=settings.db_write_batch_size,
+                    timeout=settings.db_write_timeout,
+                )
+    return _write_queue
+
+
+def close_write_queue():
+    """Drain and stop the writer thread; the next write starts a new one"""
+    global _write_queue
+    with _pool_lock:
+        write_queue, _write_queue = _write_queue, None
+    if write_queue is not None:
+        write_queue.close()
+
+
+def run_write(fn: Callable[..., Any], *args) -> Any:
+    """Run `fn(conn, *args)` in a write transaction and return its result.
+
+    Goes through the writer queue when enabled, otherwise runs directly on
+    a pooled connection. `fn` must not commit; that happens here.
+    """
+    if settings.db_write_queue_enabled:
+        return get_write_queue().submit(fn, *args)
     with get_db() as conn:
-        cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL UNIQUE,
-                password_hash TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Categories table - NOW WITH user_id
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # Goals table - NOW WITH user_id
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS goals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                title TEXT NOT NULL,
-                category_id INTEGER NOT NULL,
-                frequency TEXT NOT NULL CHECK(frequency IN ('daily', 'weekly', 'monthly', 'yearly', 'custom')),
-                target_value INTEGER DEFAULT 1,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (category_id) REFERENCES categories(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # CheckIns table - NOW WITH user_id
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS checkins (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                goal_id INTEGER NOT NULL,
-                date DATE NOT NULL,
-                value INTEGER DEFAULT 1 CHECK(value >= 0),
-                note TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (goal_id) REFERENCES goals(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # Create indexes for performance
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_categories_user ON categories(user_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_goals_user ON goals(user_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_checkins_user ON checkins(user_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_checkins_date ON checkins(date)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_checkins_goal_date ON checkins(goal_id, date)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
-        
+        result = fn(conn, *args)
         conn.commit()
+        return result
+
+
+def iter_rows(query: str, params: tuple = (), order_by: tuple = ("id",),
+              chunk_size: Optional[int] = None) -> Iterator[dict]:
+    """Yield query rows as dicts, `chunk_size` rows per page.
+
+    `query` selects every `order_by` column and ends in a WHERE clause;
+    each page appends a keyset predicate on those columns and checks out
+    its own pooled connection, so a slow consumer holds no connection (or
+    read snapshot) between pages. Rows written mid-way may or may not be
+    included.
+    """
+    chunk_size = chunk_size or settings.export_chunk_size
+    columns = ", ".join(order_by)
+    page_query = f"{query} AND ({columns}) > ({', '.join('?' * len(order_by))}) ORDER BY {columns} LIMIT ?"
+    with get_db() as conn:
+        rows = conn.execute(f"{query} ORDER BY {columns} LIMIT ?", (*params, chunk_size)).fetchall()
+    while rows:
+        for row in rows:
+            yield dict(row)
+        if len(rows) < chunk_size:
+            return
+        last = tuple(rows[-1][column] for column in order_by)
+        with get_db() as conn:
+            rows = conn.execute(page_query, (*params, *last, chunk_size)).fetchall()
+
+
+def rebuild_daily_rollup(conn: sqlite3.Connection):
+    """Recompute checkin_daily_rollup from the raw checkins table"""
+    conn.execute("DELETE FROM checkin_daily_rollup")
+    conn.execute("""
+        INSERT INTO checkin_daily_rollup (user_id, goal_id, date, total_value, count)
+        SELECT user_id, goal_id, date, SUM(value), COUNT(*)
+        FROM checkins
+        GROUP BY user_id, goal_id, date
+    """)
+
+def init_db(backfill: bool = True):
+    """Bring the schema up to date by applying pending migrations.
+
+    With `backfill=False` only backfills marked BLOCKING run here (reads
+    would be wrong without them); the rest are left to `start_backfills()`
+    so startup does not wait on them.
+    """
+    conn = connect(isolation_level=None)
+    try:
+        migrations.upgrade(conn)
+        migrations.run_backfills(conn, settings.migration_backfill_chunk_size, blocking_only=not backfill)
+    finally:
+        conn.close()
+
+
+_backfill_thread: Optional[threading.Thread] = None
+_backfill_stop = threading.Event()
+
+
+def _run_backfills():
+    conn = connect(isolation_level=None)
+    try:
+        migrations.run_backfills(
+            conn,
+            settings.migration_backfill_chunk_size,
+            pause=settings.migration_backfill_pause,
+            stop=_backfill_stop,
+            on_chunk=response_cache.clear
+        )
+    finally:
+        conn.close()
+
+
+def start_backfills():
+    """Run pending migration backfills on a background thread"""
+    global _backfill_thread
+    if _backfill_thread is not None and _backfill_thread.is_alive():
+        return
+    _backfill_stop.clear()
+    _backfill_thread = threading.Thread(target=_run_backfills, name="migration-backfill", daemon=True)
+    _backfill_thread.start()
+
+
+def stop_backfills():
+    """Stop the backfill thread after its current chunk; it resumes on next start"""
+    global _backfill_thread
+    _backfill_stop.set()
+    if _backfill_thread is not None:
+        _backfill_thread.join()
+        _backfill_thread = None
 
 def reset_db(remove_file: bool = True):
     """Remove existing sqlite DB file (if present) and recreate tables.
@@ -87,6 +491,9 @@ def reset_db(remove_file: bool = True):
     the same initialization logic in `init_db()`.
     """
     db_path = DATABASE
+    stop_backfills()
+    close_write_queue()
+    close_pool()
     if remove_file and os.path.exists(db_path):
         os.remove(db_path)
     init_db()
@@ -97,9 +504,58 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Initialize or reset the sqlite database.")
     parser.add_argument("--reset", action="store_true", help="Delete DB file and recreate tables")
+    parser.add_argument("--rebuild-rollup", action="store_true", help="Recompute daily check-in rollups from raw check-ins")
+    parser.add_argument("--import-checkins", metavar="FILE", help="Import check-ins from a CSV or NDJSON file")
+    parser.add_argument("--username", help="User that receives imported check-ins")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Import file format (default: from extension)")
+    parser.add_argument("--migrate-status", action="store_true", help="Show applied and pending schema migrations")
     args = parser.parse_args()
 
-    if args.reset:
+    if args.import_checkins:
+        from repositories.user_repository import UserRepository
+        from services.import_service import ImportService
+
+        init_db()
+        user = UserRepository.get_by_username(args.username or "")
+        if not user:
+            parser.error("--import-checkins needs --username of an existing user")
+        fmt = args.format or ("ndjson" if args.import_checkins.endswith((".ndjson", ".jsonl")) else "csv")
+        started = time.perf_counter()
+
+        def report(summary):
+            elapsed = time.perf_counter() - started
+            print(f"  {summary['processed']} rows processed, {summary['imported']} imported, "
+                  f"{summary['failed']} failed ({summary['processed'] / elapsed:,.0f} rows/s)")
+
+        with open(args.import_checkins, encoding="utf-8-sig", newline="") as stream:
+            summary = ImportService.import_checkins(
+                user['id'], ImportService.read_records(stream, fmt), on_progress=report
+            )
+        close_write_queue()
+        for error in summary['errors']:
+            print(f"  line {error['line']}: {error['error']}")
+        print(f"Imported {summary['imported']} check-ins "
+              f"({summary['goals_created']} goals, {summary['categories_created']} categories created)")
+    elif args.migrate_status:
+        conn = connect(isolation_level=None)
+        try:
+            for migration in migrations.status(conn):
+                state = "pending"
+                if migration["applied_at"]:
+                    state = f"applied {migration['applied_at']}"
+                    if not migration["backfill_done"]:
+                        state += ", backfill pending"
+                print(f"  v{migration['version']:03d} {migration['description']}: {state}")
+        finally:
+            conn.close()
+    elif args.rebuild_rollup:
+        init_db()
+        with get_db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rebuild_daily_rollup(conn)
+            conn.commit()
+        print(f"Daily rollup rebuilt at: {DATABASE}")
+    elif args.reset:
         reset_db()
         print(f"Database reset at: {DATABASE}")
     else:
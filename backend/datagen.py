@@ -0,0 +1,308 @@
+"""Deterministic synthetic data for scaling tests.
+
+Builds users with a realistic mix of goals and bursty check-in histories,
+writing straight to SQLite with bulk inserts:
+
+    python datagen.py --users 100000 --goals 4-12 --years 3 --seed 42
+
+The schema comes from init_db(); secondary indexes are dropped during the
+load and rebuilt once at the end, and the daily rollup and data versions
+are written alongside the check-ins. The same arguments always produce the
+same data; only the salt of the shared password hash differs between runs.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import database
+from auth import hash_password
+
+PASSWORD = "password"
+
+CATEGORIES = ["Fitness", "Personal Growth", "Financial", "Relationships", "Community", "Self-Care"]
+
+GOAL_TITLES = {
+    "Fitness": ["Go to the gym", "Run", "Yoga", "Walk 10k steps", "Swim", "Stretch"],
+    "Personal Growth": ["Read", "Journal", "Practice guitar", "Learn Spanish", "Meditate", "Online course"],
+    "Financial": ["Track expenses", "No-spend day", "Save", "Review budget", "Invest"],
+    "Relationships": ["Call family", "Date night", "Message a friend", "Family dinner"],
+    "Community": ["Volunteer", "Donate", "Attend a meetup", "Help a neighbour"],
+    "Self-Care": ["Drink water", "Sleep 8 hours", "Skincare", "Screen-free evening", "Take vitamins"],
+}
+
+FREQUENCY_WEIGHTS = {"daily": 40, "weekly": 30, "monthly": 15, "yearly": 5, "custom": 10}
+TARGET_RANGES = {"daily": (1, 3), "weekly": (1, 5), "monthly": (1, 10), "yearly": (1, 24), "custom": (1, 20)}
+
+# Chance of checking in on a given day while a goal is in an active streak
+ACTIVE_DAY_RATE = {"daily": 0.85, "weekly": 0.45, "monthly": 0.2, "yearly": 0.05, "custom": 0.35}
+
+NOTES = [
+    "Felt great", "Hard one today", "Short session", "Personal best!", "Almost skipped",
+    "With a friend", "Back on track", "Tired but did it", "Early morning", "Late night",
+]
+NOTE_RATE = 0.08
+EXTRA_CHECKIN_RATE = 0.25  # chance of each further check-in on the same day
+MAX_CHECKINS_PER_DAY = 6
+USERS_PER_JOB = 50  # users generated per worker task
+
+GENERATED_TABLES = ("users", "categories", "goals", "checkins", "checkin_daily_rollup", "user_data_versions")
+
+
+def _weighted_choice(rng: random.Random, weights: Dict[str, int]) -> str:
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _spells(rng: random.Random, days: int, engagement: float):
+    """Yield (first_day, length, active) spells covering `days` days.
+
+    Engaged users have long streaks and short gaps; others the reverse,
+    which gives the bursty pattern real habit data shows.
+    """
+    mean_streak = 4 + 40 * engagement
+    mean_gap = 2 + 30 * (1 - engagement)
+    active = rng.random() < engagement
+    day = 0
+    while day < days:
+        length = max(1, int(rng.expovariate(1 / (mean_streak if active else mean_gap))))
+        yield day, min(length, days - day), active
+        day += length
+        active = not active
+
+
+# "HH:MM:SS" for every second of the day, so check-in times are a lookup
+_TIMES_OF_DAY = [f"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}" for second in range(86400)]
+
+
+def goal_count(seed: int, user_id: int, goals_range: Tuple[int, int]) -> int:
+    """How many goals a user gets, drawn separately so ids can be assigned up front"""
+    return random.Random(f"{seed}:{user_id}:goals").randint(*goals_range)
+
+
+def generate_user(
+    seed: int,
+    user_id: int,
+    first_goal_id: int,
+    goals: int,
+    start_date: date,
+    days: int
+) -> Tuple[List[tuple], List[tuple], List[tuple], List[tuple]]:
+    """Rows for one user's categories, goals, check-ins and rollup"""
+    rng = random.Random(f"{seed}:{user_id}")
+    rand = rng.random
+    first_category_id = (user_id - 1) * len(CATEGORIES) + 1
+    categories = [
+        (first_category_id + offset, user_id, title, f"{start_date - timedelta(days=30)} 09:00:00")
+        for offset, title in enumerate(CATEGORIES)
+    ]
+    day_strings = [(start_date + timedelta(days=offset)).isoformat() for offset in range(days)]
+    engagement = rng.betavariate(2, 2)
+
+    goal_rows, checkins, rollup = [], [], []
+    for goal_id in range(first_goal_id, first_goal_id + goals):
+        category_index = rng.randrange(len(CATEGORIES))
+        frequency = _weighted_choice(rng, FREQUENCY_WEIGHTS)
+        target_value = rng.randint(*TARGET_RANGES[frequency])
+        created = start_date - timedelta(days=rng.randint(1, 30))
+        goal_rows.append((
+            goal_id, user_id, rng.choice(GOAL_TITLES[CATEGORIES[category_index]]),
+            first_category_id + category_index, frequency, target_value,
+            int(rand() < 0.9), f"{created} 12:00:00"
+        ))
+
+        rate = ACTIVE_DAY_RATE[frequency]
+        # Check-ins cluster around the goal's usual time, within about +-5 hours
+        usual_second = rng.choice((7, 12, 19)) * 3600
+        for first_day, length, active in _spells(rng, days, engagement):
+            if not active:
+                continue
+            for day_offset in range(first_day, first_day + length):
+                if rand() >= rate:
+                    continue
+                count = 1
+                while count < MAX_CHECKINS_PER_DAY and rand() < EXTRA_CHECKIN_RATE:
+                    count += 1
+                day = day_strings[day_offset]
+                seconds = sorted(
+                    min(86399, max(0, usual_second + int((rand() + rand() - 1) * 18000))) for _ in range(count)
+                )
+                total = 0
+                for second in seconds:
+                    value = 1 if rand() < 0.8 else rng.randint(2, 5)
+                    note = rng.choice(NOTES) if rand() < NOTE_RATE else None
+                    checkins.append((user_id, goal_id, day, value, note, f"{day} {_TIMES_OF_DAY[second]}"))
+                    total += value
+                rollup.append((user_id, goal_id, day, total, count))
+
+    return categories, goal_rows, checkins, rollup
+
+
+def _generate_users(job: Tuple[int, List[Tuple[int, int, int]], date, int]) -> List[tuple]:
+    """Worker entry point: generate_user() for each (user_id, first_goal_id, goals)"""
+    seed, users, start_date, days = job
+    return [generate_user(seed, user_id, first_goal_id, goals, start_date, days)
+            for user_id, first_goal_id, goals in users]
+
+
+def _drop_secondary_indexes(conn: sqlite3.Connection) -> List[str]:
+    """Drop the explicit indexes on generated tables, returning their SQL"""
+    placeholders = ",".join("?" * len(GENERATED_TABLES))
+    rows = conn.execute(f"""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+    """, GENERATED_TABLES).fetchall()
+    for name, _ in rows:
+        conn.execute(f"DROP INDEX {name}")
+    return [sql for _, sql in rows]
+
+
+def generate(
+    users: int,
+    goals_range: Tuple[int, int] = (4, 12),
+    years: int = 1,
+    seed: int = 0,
+    end_date: Optional[date] = None,
+    batch_rows: int = 200_000,
+    workers: int = 1,
+    on_progress: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """Fill the empty database at `database.DATABASE` with synthetic data.
+
+    Check-ins cover January 1st `years - 1` years before `end_date` through
+    `end_date` (default today). Each user gets its own RNG derived from
+    `seed`, so output depends on neither `batch_rows` nor `workers`; with
+    `workers > 1` users are generated in that many processes.
+    """
+    end_date = end_date or date.today()
+    start_date = date(end_date.year - years + 1, 1, 1)
+    days = (end_date - start_date).days + 1
+
+    database.init_db()
+    database.close_write_queue()
+    database.close_pool()
+    conn = sqlite3.connect(database.DATABASE, isolation_level=None)
+    if conn.execute("SELECT EXISTS (SELECT 1 FROM users)").fetchone()[0]:
+        conn.close()
+        raise ValueError(f"{database.DATABASE} already has users; generate into an empty database")
+
+    # Generated data can be rebuilt, so trade crash safety for load speed
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -200000")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+    password_hash = hash_password(PASSWORD)
+    summary = {"users": 0, "goals": 0, "checkins": 0, "start_date": start_date.isoformat(),
+               "end_date": end_date.isoformat()}
+    index_sql = _drop_secondary_indexes(conn)
+    pending = {"users": [], "categories": [], "goals": [], "checkins": [], "rollup": []}
+
+    def flush():
+        conn.execute("BEGIN")
+        conn.executemany("""
+            INSERT INTO users (id, username, password_hash, created_at) VALUES (?, ?, ?, ?)
+        """, pending["users"])
+        conn.executemany("""
+            INSERT INTO user_data_versions (user_id, version) VALUES (?, 1)
+        """, [(row[0],) for row in pending["users"]])
+        conn.executemany("""
+            INSERT INTO categories (id, user_id, title, created_at) VALUES (?, ?, ?, ?)
+        """, pending["categories"])
+        conn.executemany("""
+            INSERT INTO goals (id, user_id, title, category_id, frequency, target_value, is_active, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, pending["goals"])
+        conn.executemany("""
+            INSERT INTO checkins (user_id, goal_id, date, value, note, created_at) VALUES (?, ?, ?, ?, ?, ?)
+        """, pending["checkins"])
+        conn.executemany("""
+            INSERT INTO checkin_daily_rollup (user_id, goal_id, date, total_value, count) VALUES (?, ?, ?, ?, ?)
+        """, pending["rollup"])
+        conn.execute("COMMIT")
+        for rows in pending.values():
+            rows.clear()
+        if on_progress:
+            on_progress(summary)
+
+    def jobs():
+        next_goal_id = 1
+        for first_user in range(1, users + 1, USERS_PER_JOB):
+            batch = []
+            for user_id in range(first_user, min(first_user + USERS_PER_JOB, users + 1)):
+                goals = goal_count(seed, user_id, goals_range)
+                batch.append((user_id, next_goal_id, goals))
+                next_goal_id += goals
+            yield seed, batch, start_date, days
+
+    user_created_at = f"{start_date - timedelta(days=31)} 08:00:00"
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        results = pool.imap(_generate_users, jobs()) if pool else map(_generate_users, jobs())
+        for generated in results:
+            for categories, goals, checkins, rollup in generated:
+                user_id = categories[0][1]
+                pending["users"].append((user_id, f"user{user_id:07d}", password_hash, user_created_at))
+                pending["categories"].extend(categories)
+                pending["goals"].extend(goals)
+                pending["checkins"].extend(checkins)
+                pending["rollup"].extend(rollup)
+                summary["users"] += 1
+                summary["goals"] += len(goals)
+                summary["checkins"] += len(checkins)
+            if len(pending["checkins"]) >= batch_rows:
+                flush()
+        flush()
+    finally:
+        if pool:
+            pool.terminate()
+        for sql in index_sql:
+            conn.execute(sql)
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.close()
+    return summary
+
+
+def _goals_range(value: str) -> Tuple[int, int]:
+    low, _, high = value.partition("-")
+    low, high = int(low), int(high or low)
+    if low < 0 or high < low:
+        raise argparse.ArgumentTypeError("expected N or MIN-MAX")
+    return low, high
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic 365WithMe database.")
+    parser.add_argument("--users", type=int, required=True)
+    parser.add_argument("--goals", type=_goals_range, default=(4, 12), help="Goals per user, N or MIN-MAX")
+    parser.add_argument("--years", type=int, default=1, help="Years of check-in history")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--end-date", type=date.fromisoformat, help="Last day of history (default: today)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Generator processes")
+    parser.add_argument("--database", help=f"Output file (default: {database.DATABASE})")
+    parser.add_argument("--reset", action="store_true", help="Delete the output file first")
+    args = parser.parse_args()
+
+    if args.database:
+        database.DATABASE = args.database
+    if args.reset:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(database.DATABASE + suffix):
+                os.remove(database.DATABASE + suffix)
+    started = time.perf_counter()
+
+    def report(summary):
+        elapsed = time.perf_counter() - started
+        print(f"  {summary['users']:,} users, {summary['checkins']:,} check-ins "
+              f"({summary['checkins'] / elapsed:,.0f} check-ins/s)")
+
+    summary = generate(
+        args.users, args.goals, args.years, args.seed, args.end_date,
+        workers=args.workers, on_progress=report
+    )
+    print(f"Generated {summary['users']:,} users, {summary['goals']:,} goals and "
+          f"{summary['checkins']:,} check-ins ({summary['start_date']} to {summary['end_date']}) "
+          f"in {time.perf_counter() - started:.1f}s at: {database.DATABASE}")
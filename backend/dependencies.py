@@ -1,6 +1,10 @@
-from fastapi import Header, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Request, Response, status
 from auth import decode_token
+from concurrency import run_db
+from repositories.data_version_repository import DataVersionRepository
+from datetime import date
 from typing import Optional
+import hashlib
 
 async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
     """
@@ -39,3 +43,28 @@ async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
         )
     
     return payload
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Dependency adding an ETag to user-scoped GET responses.
+    The tag is derived from the user's data version, so If-None-Match is
+    answered with 304 without reading any data tables.
+    """
+    version = await run_db(DataVersionRepository.get, current_user['user_id'])
+    # Today's date is part of the tag because progress windows move daily
+    fingerprint = f"{current_user['user_id']}:{version}:{date.today()}:{request.url.path}?{request.url.query}"
+    etag = f'W/"{hashlib.sha1(fingerprint.encode()).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Weak comparison: W/"x" and "x" match
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag.removeprefix("W/") in candidates or "*" in candidates:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
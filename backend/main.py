@@ -1,8 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
-from database import init_db
-from routes import categories, goals, checkins, progress
+from cache import principal_cache, response_cache, token_cache
+from concurrency import shutdown_executors
+from metrics import InstrumentationMiddleware, render as render_metrics
+from profiling import ProfilingMiddleware
+from database import (
+    init_db, close_pool, close_write_queue, get_pool, get_write_queue, start_backfills, stop_backfills
+)
+from routes import categories, goals, checkins, progress, export, imports
 from routes import auth 
 
 app = FastAPI(
@@ -19,27 +26,63 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Request timing and per-request SQL counts
+if settings.metrics_enabled:
+    app.add_middleware(InstrumentationMiddleware)
+
+# Opt-in profiling of single requests (see profiling.py)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(auth.router) 
 app.include_router(categories.router)
 app.include_router(goals.router)
 app.include_router(checkins.router)
 app.include_router(progress.router)
+app.include_router(export.router)
+app.include_router(imports.router)
 
 @app.on_event("startup")
 async def startup_event():
-    init_db()
+    # Apply schema changes and blocking backfills now; the rest continue in the background
+    init_db(backfill=False)
+    start_backfills()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    stop_backfills()
+    shutdown_executors()
+    close_write_queue()
+    close_pool()
 
 @app.get("/")
 async def root():
     return {"message": settings.app_name, "version": settings.api_version}
 
+def component_stats() -> dict:
+    return {
+        "db_pool": get_pool().stats(),
+        "db_writes": get_write_queue().stats(),
+        "progress_cache": response_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "principal_cache": principal_cache.stats(),
+    }
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", **component_stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus metrics: request latency, SQL per request, pool and cache stats"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(render_metrics(component_stats()), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
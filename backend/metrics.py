@@ -0,0 +1,264 @@
+import bisect
+import contextvars
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import settings
+
+logger = logging.getLogger("365withme.metrics")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 500)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label tuple"""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets: Iterable[float]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # per-bucket counts (+Inf last), sum
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for label_values, counts, total in sorted(snapshot):
+            pairs = list(zip(self.labels, label_values))
+            base = _format_labels(pairs)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{base} {total}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter with one series per label tuple"""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._series: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._series.items())
+        for label_values, value in snapshot:
+            lines.append(f"{self.name}{_format_labels(zip(self.labels, label_values))} {value}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Time to send the full response",
+    ("method", "route", "status"), LATENCY_BUCKETS
+)
+request_queries = Histogram(
+    "http_request_db_queries", "SQL statements executed per request",
+    ("method", "route"), QUERY_COUNT_BUCKETS
+)
+request_db_time = Histogram(
+    "http_request_db_seconds", "Time spent in SQLite per request",
+    ("method", "route"), LATENCY_BUCKETS
+)
+query_duration = Histogram(
+    "db_query_duration_seconds", "Time per SQL statement, including fetches",
+    (), LATENCY_BUCKETS
+)
+slow_queries = Counter("db_slow_queries_total", "SQL statements slower than slow_query_ms", ("route",))
+
+METRICS = (request_duration, request_queries, request_db_time, query_duration, slow_queries)
+
+
+class RequestStats:
+    """SQL activity attributed to the current request"""
+    __slots__ = ("route", "queries", "db_time")
+
+    def __init__(self, route: str = ""):
+        self.route = route
+        self.queries = 0
+        self.db_time = 0.0
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def _record(sql: str, elapsed: float, is_query: bool):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_time += elapsed
+        if is_query:
+            stats.queries += 1
+    if is_query:
+        query_duration.observe(elapsed)
+        if elapsed * 1000 >= settings.slow_query_ms:
+            route = stats.route if stats is not None else ""
+            slow_queries.inc(route)
+            logger.warning("Slow query (%.1f ms) on %s: %s",
+                           elapsed * 1000, route or "background", _WHITESPACE.sub(" ", sql).strip())
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports statement and fetch time to the current request"""
+
+    _sql = ""
+
+    def execute(self, sql, parameters=()):
+        self._sql = sql
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record(sql, time.perf_counter() - started, True)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._sql = sql
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record(sql, time.perf_counter() - started, True)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            _record(self._sql, time.perf_counter() - started, False)
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        try:
+            return super().fetchmany(size if size is not None else self.arraysize)
+        finally:
+            _record(self._sql, time.perf_counter() - started, False)
+
+    def fetchall(self):
+        started = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            _record(self._sql, time.perf_counter() - started, False)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors and execute shortcuts are instrumented"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The C shortcuts bypass cursor(), so route them through it explicitly
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class InstrumentationMiddleware:
+    """Times requests, counts their SQL and adds a Server-Timing header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                elapsed = time.perf_counter() - started
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", (
+                    f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+                    f"app;dur={elapsed * 1000:.1f}"
+                ).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            # Route is only known after routing; set it early for slow-query logs
+            stats.route = scope.get("path", "")
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            elapsed = time.perf_counter() - started
+            method = scope["method"]
+            route = _route_label(scope)
+            request_duration.observe(elapsed, method, route, str(status["code"]))
+            request_queries.observe(stats.queries, method, route)
+            request_db_time.observe(stats.db_time, method, route)
+            if stats.queries > settings.request_query_warn_threshold:
+                logger.warning("%s %s ran %d SQL statements (%.1f ms in SQLite)",
+                               method, route, stats.queries, stats.db_time * 1000)
+
+
+def render(gauges: Optional[Dict[str, dict]] = None) -> str:
+    """Prometheus text exposition of all metrics plus numeric `gauges` stats"""
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    for component, values in (gauges or {}).items():
+        for key, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"app_{component}_{key}"
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,196 @@
+"""Versioned schema migrations.
+
+Every ``vNNN_<name>.py`` module in this package is one migration and defines:
+
+- ``VERSION`` (int) and ``DESCRIPTION`` (str)
+- ``upgrade(conn)``: schema changes, applied in a single short transaction
+- ``backfill(conn, cursor, chunk_size)`` (optional): migrate the next chunk of
+  existing data after ``cursor`` and return the new cursor, or None when done
+- ``BLOCKING`` (optional, default False): reads depend on the backfilled data,
+  so the backfill finishes during startup instead of in the background
+
+Schema upgrades run in version order and are recorded in ``schema_version``.
+Backfills run afterwards, one small transaction per chunk, and store their
+cursor after each chunk so an interrupted backfill resumes where it stopped.
+"""
+import importlib
+import pkgutil
+import re
+import sqlite3
+import threading
+import time
+from types import ModuleType
+from typing import Callable, Dict, List, Optional
+
+_MODULE_NAME = re.compile(r"^v(\d+)_\w+$")
+
+
+def load_migrations() -> List[ModuleType]:
+    """Import every migration module in this package, ordered by VERSION"""
+    modules = []
+    for info in pkgutil.iter_modules(__path__):
+        if _MODULE_NAME.match(info.name):
+            modules.append(importlib.import_module(f"{__name__}.{info.name}"))
+    modules.sort(key=lambda module: module.VERSION)
+
+    versions = [module.VERSION for module in modules]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return modules
+
+
+def column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    """Whether `table` already has `column`, for idempotent ALTER TABLE steps"""
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def _ensure_version_table(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            backfill_cursor TEXT,
+            backfill_done BOOLEAN NOT NULL DEFAULT 1,
+            backfilled_at TIMESTAMP
+        )
+    """)
+
+
+def _applied(conn: sqlite3.Connection) -> Dict[int, sqlite3.Row]:
+    _ensure_version_table(conn)
+    rows = conn.execute("SELECT * FROM schema_version ORDER BY version").fetchall()
+    return {row["version"]: row for row in rows}
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Highest applied migration version (0 for an empty database)"""
+    return max(_applied(conn), default=0)
+
+
+def status(conn: sqlite3.Connection) -> List[dict]:
+    """Applied/pending state of every known migration"""
+    applied = _applied(conn)
+    result = []
+    for module in load_migrations():
+        row = applied.get(module.VERSION)
+        result.append({
+            "version": module.VERSION,
+            "description": module.DESCRIPTION,
+            "applied_at": row["applied_at"] if row else None,
+            "backfill_done": bool(row["backfill_done"]) if row else False,
+        })
+    return result
+
+
+def upgrade(conn: sqlite3.Connection) -> List[int]:
+    """Apply pending schema upgrades in order; returns the versions applied.
+
+    `conn` must be in autocommit mode (isolation_level=None) so each
+    migration controls its own transaction.
+    """
+    applied = _applied(conn)
+    newly_applied = []
+    for module in load_migrations():
+        if module.VERSION in applied:
+            continue
+        has_backfill = hasattr(module, "backfill")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have applied it while we waited for the lock
+            if conn.execute(
+                "SELECT 1 FROM schema_version WHERE version = ?", (module.VERSION,)
+            ).fetchone():
+                conn.execute("COMMIT")
+                continue
+            module.upgrade(conn)
+            conn.execute("""
+                INSERT INTO schema_version (version, description, backfill_done)
+                VALUES (?, ?, ?)
+            """, (module.VERSION, module.DESCRIPTION, not has_backfill))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        newly_applied.append(module.VERSION)
+    return newly_applied
+
+
+def pending_backfills(conn: sqlite3.Connection) -> List[ModuleType]:
+    """Applied migrations whose data backfill has not finished yet"""
+    applied = _applied(conn)
+    return [
+        module for module in load_migrations()
+        if module.VERSION in applied and not applied[module.VERSION]["backfill_done"]
+    ]
+
+
+def run_backfill(
+    conn: sqlite3.Connection,
+    module: ModuleType,
+    chunk_size: int,
+    pause: float = 0.0,
+    stop: Optional[threading.Event] = None,
+    on_chunk: Optional[Callable[[], None]] = None
+) -> bool:
+    """Run one migration's backfill chunk by chunk; False if stopped early.
+
+    Each chunk and its cursor update commit together, so the write lock is
+    only held for one chunk and a crash never loses or repeats work. The
+    cursor is read inside each chunk's transaction, so processes running
+    the same backfill take turns instead of repeating chunks.
+    """
+    while True:
+        if stop is not None and stop.is_set():
+            return False
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT backfill_cursor, backfill_done FROM schema_version WHERE version = ?",
+                (module.VERSION,)
+            ).fetchone()
+            if row is None or row["backfill_done"]:
+                conn.execute("COMMIT")
+                return True
+            cursor = module.backfill(conn, row["backfill_cursor"], chunk_size)
+            if cursor is None:
+                conn.execute("""
+                    UPDATE schema_version
+                    SET backfill_cursor = NULL, backfill_done = 1, backfilled_at = CURRENT_TIMESTAMP
+                    WHERE version = ?
+                """, (module.VERSION,))
+            else:
+                conn.execute(
+                    "UPDATE schema_version SET backfill_cursor = ? WHERE version = ?",
+                    (str(cursor), module.VERSION)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if on_chunk is not None:
+            on_chunk()
+        if cursor is None:
+            return True
+        if pause:
+            time.sleep(pause)
+
+
+def run_backfills(
+    conn: sqlite3.Connection,
+    chunk_size: int,
+    pause: float = 0.0,
+    stop: Optional[threading.Event] = None,
+    on_chunk: Optional[Callable[[], None]] = None,
+    blocking_only: bool = False
+) -> bool:
+    """Run every pending backfill in version order; False if stopped early.
+
+    With `blocking_only` only migrations marked BLOCKING are backfilled.
+    """
+    for module in pending_backfills(conn):
+        if blocking_only and not getattr(module, "BLOCKING", False):
+            continue
+        if not run_backfill(conn, module, chunk_size, pause, stop, on_chunk):
+            return False
+    return True
@@ -0,0 +1,13 @@
+"""Per-user data versions used for ETags"""
+VERSION = 2
+DESCRIPTION = "Per-user data versions"
+
+
+def upgrade(conn):
+    # Monotonic per-user counter bumped by every write
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_data_versions (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
@@ -0,0 +1,50 @@
+"""Per user/goal/day check-in totals, backfilled a batch of users at a time"""
+VERSION = 3
+DESCRIPTION = "Daily check-in rollup"
+# Progress reads come from the rollup, so it must be complete before serving
+BLOCKING = True
+
+
+def upgrade(conn):
+    # Kept in sync by CheckInRepository writes once it exists
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS checkin_daily_rollup (
+            user_id INTEGER NOT NULL,
+            goal_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            total_value INTEGER NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, goal_id, date)
+        ) WITHOUT ROWID
+    """)
+
+
+def backfill(conn, cursor, chunk_size):
+    """Recompute the rollup for the next `chunk_size` users after `cursor`.
+
+    Live writes keep updating the rollup meanwhile; recomputing a user's rows
+    from checkins inside one transaction is correct whichever runs first.
+    """
+    after = int(cursor or 0)
+    user_ids = [row[0] for row in conn.execute(
+        "SELECT id FROM users WHERE id > ? ORDER BY id LIMIT ?", (after, chunk_size)
+    )]
+    if not user_ids:
+        return None
+    last = user_ids[-1]
+
+    conn.execute("DELETE FROM checkin_daily_rollup WHERE user_id > ? AND user_id <= ?", (after, last))
+    conn.execute("""
+        INSERT INTO checkin_daily_rollup (user_id, goal_id, date, total_value, count)
+        SELECT user_id, goal_id, date, SUM(value), COUNT(*)
+        FROM checkins
+        WHERE user_id > ? AND user_id <= ?
+        GROUP BY user_id, goal_id, date
+    """, (after, last))
+    # Progress served from a partial rollup must not stay valid for ETags
+    conn.execute("""
+        INSERT INTO user_data_versions (user_id, version)
+        SELECT id, 1 FROM users WHERE id > ? AND id <= ?
+        ON CONFLICT (user_id) DO UPDATE SET version = version + 1
+    """, (after, last))
+    return last
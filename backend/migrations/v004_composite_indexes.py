@@ -0,0 +1,28 @@
+"""User-scoped composite indexes replacing the original single-column ones"""
+VERSION = 4
+DESCRIPTION = "Composite user-scoped indexes"
+
+# Single-column or superseded indexes replaced by the composite ones below
+OBSOLETE_INDEXES = (
+    "idx_categories_user",
+    "idx_goals_user",
+    "idx_checkins_user",
+    "idx_checkins_date",
+    "idx_checkins_goal_date",
+    "idx_checkins_user_date",
+    "idx_users_username",  # duplicates the UNIQUE constraint's index
+)
+
+
+def upgrade(conn):
+    for index_name in OBSOLETE_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+    # Every query filters by user_id first
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_categories_user_title ON categories(user_id, title)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_goals_user_frequency ON goals(user_id, frequency, is_active)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_goals_user_category ON goals(user_id, category_id, is_active)")
+    # (user_id, date) and (user_id, goal_id, date) listings, with created_at for keyset pagination
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_checkins_user_date_created ON checkins(user_id, date, created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_checkins_user_goal_date ON checkins(user_id, goal_id, date, created_at)")
+    # Value sums come from the rollup, whose primary key is (user_id, goal_id, date)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_rollup_user_date ON checkin_daily_rollup(user_id, date, total_value, count)")
@@ -0,0 +1,11 @@
+"""Optional start/end dates bounding a custom goal's progress window"""
+from migrations import column_exists
+
+VERSION = 5
+DESCRIPTION = "Goal start and end dates"
+
+
+def upgrade(conn):
+    for column in ("start_date", "end_date"):
+        if not column_exists(conn, "goals", column):
+            conn.execute(f"ALTER TABLE goals ADD COLUMN {column} DATE")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
 from typing import Optional
 from datetime import date
 from datetime import datetime, timedelta
@@ -6,6 +6,13 @@ from typing import Optional
 import jwt
 import hashlib
 
+def validation_error_message(error: ValidationError, whole: str = "row") -> str:
+    """Compact 'field: message' summary of a validation error for API responses"""
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in err['loc']) or whole}: {err['msg']}"
+        for err in error.errors()
+    )
+
 # Category Models
 class CategoryBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=100)
@@ -23,16 +30,34 @@ class Category(CategoryBase):
         from_attributes = True
 
 # Goal Models
-class GoalBase(BaseModel):
+class GoalDates(BaseModel):
+    # Bound a custom goal's progress window; open-ended where unset
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+class GoalDateRange(GoalDates):
+    # Input-only checks; responses must serialize whatever is stored
+    @field_validator("start_date", "end_date")
+    @classmethod
+    def date_is_iso(cls, value: Optional[str]) -> Optional[str]:
+        return date.fromisoformat(value).isoformat() if value else None
+    
+    @model_validator(mode="after")
+    def end_after_start(self):
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+class GoalBase(GoalDates):
     title: str = Field(..., min_length=1, max_length=200)
     category_id: int
     frequency: str = Field(..., pattern="^(daily|weekly|monthly|yearly|custom)$")
     target_value: int = Field(default=1, ge=1)  # Changed from target_per_period
 
-class GoalCreate(GoalBase):
+class GoalCreate(GoalBase, GoalDateRange):
     pass
 
-class GoalUpdate(BaseModel):
+class GoalUpdate(GoalDateRange):
     title: Optional[str] = Field(None, min_length=1, max_length=200)
     category_id: Optional[int] = None
     frequency: Optional[str] = Field(None, pattern="^(daily|weekly|monthly|yearly|custom)$")
@@ -62,6 +87,41 @@ class CheckIn(CheckInBase):
     class Config:
         from_attributes = True
 
+class CheckInBatchCreate(BaseModel):
+    # Items are validated one by one so a bad entry fails alone, not the batch
+    items: list[dict] = Field(..., min_length=1, max_length=1000)
+
+class CheckInBatchItemResult(BaseModel):
+    index: int
+    status: str  # "created", "invalid" or "goal_not_found"
+    checkin: Optional[CheckIn] = None
+    error: Optional[str] = None
+
+class CheckInBatchResult(BaseModel):
+    created: int
+    failed: int
+    results: list[CheckInBatchItemResult]
+
+class CheckInImportRow(CheckInCreate):
+    """One imported check-in; the goal is given by id or by title"""
+    goal_id: Optional[int] = None
+    goal: Optional[str] = Field(None, min_length=1, max_length=200)
+    # Used only when the goal (or its category) has to be created
+    category: str = Field("Imported", min_length=1, max_length=100)
+    frequency: str = Field("daily", pattern="^(daily|weekly|monthly|yearly|custom)$")
+    target_value: int = Field(default=1, ge=1)
+    
+    @field_validator("date")
+    @classmethod
+    def date_is_iso(cls, value: str) -> str:
+        return date.fromisoformat(value).isoformat()
+    
+    @model_validator(mode="after")
+    def goal_given(self):
+        if self.goal_id is None and self.goal is None:
+            raise ValueError("Either goal_id or goal is required")
+        return self
+
 # Progress Models - UPDATED
 class ProgressByFrequency(BaseModel):
     frequency: str
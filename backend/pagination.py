@@ -0,0 +1,38 @@
+import base64
+import json
+from typing import Callable, List, Optional, Tuple
+
+# Keyset position of a check-in row: (date, created_at, id)
+Keyset = Tuple[str, str, int]
+
+
+def encode_cursor(row: dict) -> str:
+    """Opaque cursor pointing just past `row` in (date, created_at, id) order"""
+    raw = json.dumps([row['date'], row['created_at'], row['id']], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Keyset:
+    """Decode a cursor from encode_cursor; raises ValueError when malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        check_date, created_at, row_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(check_date, str) or not isinstance(created_at, str) or not isinstance(row_id, int):
+        raise ValueError("Invalid cursor")
+    return check_date, created_at, row_id
+
+
+def fetch_page(fetch: Callable[[int, Optional[Keyset]], List[dict]], limit: int,
+               cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+    """Fetch one page via `fetch(limit, after)` and return (rows, next_cursor).
+
+    One extra row is requested to learn whether another page exists.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    rows = fetch(limit + 1, after)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
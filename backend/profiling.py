@@ -0,0 +1,231 @@
+import cProfile
+import contextvars
+import hmac
+import io
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional
+from urllib.parse import parse_qs
+from config import settings
+
+logger = logging.getLogger("365withme.profiling")
+
+MODES = ("cprofile", "sample", "both")
+
+_active: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+# One profiled request at a time keeps profiles readable and overhead bounded
+_busy = threading.Lock()
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+_SLUG = re.compile(r"[^A-Za-z0-9]+")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(_BACKEND_DIR):
+        filename = os.path.relpath(filename, _BACKEND_DIR)
+    else:
+        filename = os.path.basename(filename)
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({filename})"
+
+
+class RequestProfile:
+    """Profiles one request across the event loop and the threads it uses.
+
+    cProfile only sees the thread it is enabled on, so work run through
+    run_db gets its own profiler per call and the results are merged.
+    The sampler records the stacks of every thread currently working for
+    the request. Event loop samples and timings can include other
+    requests interleaved on the loop.
+    """
+
+    def __init__(self, mode: str, name: str):
+        self.mode = mode
+        self.name = name
+        self.loop_thread = threading.get_ident()
+        self.threads = {self.loop_thread}
+        self.profiles: List[cProfile.Profile] = []
+        self.samples: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    @property
+    def uses_cprofile(self) -> bool:
+        return self.mode in ("cprofile", "both")
+
+    @property
+    def uses_sampler(self) -> bool:
+        return self.mode in ("sample", "both")
+
+    def _sample(self):
+        interval = settings.profiling_sample_interval
+        names = {}
+        while not self._stop.wait(interval):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self.threads)
+            for ident in threads:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                if ident not in names:
+                    names[ident] = next(
+                        (thread.name for thread in threading.enumerate() if thread.ident == ident), str(ident)
+                    )
+                stack.append(names[ident])
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        if self.uses_sampler:
+            self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call `func` in the current thread as part of this request's profile"""
+        ident = threading.get_ident()
+        with self._lock:
+            self.threads.add(ident)
+        profiler = cProfile.Profile() if self.uses_cprofile else None
+        try:
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Interpreters with one global profiler already cover this thread
+                    profiler = None
+            return func(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                with self._lock:
+                    self.profiles.append(profiler)
+            if ident != self.loop_thread:
+                with self._lock:
+                    self.threads.discard(ident)
+
+    def save(self, directory: str) -> List[str]:
+        """Write <name>.prof (pstats) and/or <name>.collapsed; returns the paths"""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        if self.profiles:
+            stats = pstats.Stats(self.profiles[0])
+            for profiler in self.profiles[1:]:
+                stats.add(profiler)
+            path = os.path.join(directory, f"{self.name}.prof")
+            stats.dump_stats(path)
+            paths.append(path)
+
+            summary = io.StringIO()
+            pstats.Stats(path, stream=summary).sort_stats("cumulative").print_stats(15)
+            logger.info("Profile %s:\n%s", self.name, summary.getvalue())
+        if self.samples:
+            path = os.path.join(directory, f"{self.name}.collapsed")
+            with open(path, "w") as stream:
+                for stack, count in sorted(self.samples.items()):
+                    stream.write(f"{stack} {count}\n")
+            paths.append(path)
+        elif self.uses_sampler:
+            logger.info("Profile %s: no stack samples, the request finished within one sampling interval",
+                        self.name)
+        return paths
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _active.get()
+
+
+def profiled(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap `func` to join the current request's profile, if there is one"""
+    profile = _active.get()
+    if profile is None:
+        return func
+    return lambda *args, **kwargs: profile.run(func, *args, **kwargs)
+
+
+def _requested_mode(scope) -> Optional[str]:
+    """The profiling mode asked for by an authorized request, else None"""
+    headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+    mode = headers.get("x-profile")
+    token = headers.get("x-profile-token")
+    if mode is None:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        mode = (query.get("profile") or [None])[0]
+        token = (query.get("profile_token") or [None])[0]
+    if not mode or not settings.profiling_token or not token:
+        return None
+    if not hmac.compare_digest(token.encode(), settings.profiling_token.encode()):
+        return None
+    mode = mode.lower()
+    return mode if mode in MODES else settings.profiling_default_mode
+
+
+class ProfilingMiddleware:
+    """Profiles requests carrying X-Profile and a valid X-Profile-Token.
+
+    The query parameters profile= and profile_token= work too, for
+    browsers. Results are written to settings.profiling_output_dir and the
+    response names them in an X-Profile header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        mode = _requested_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if not _busy.acquire(blocking=False):
+            await self.app(scope, receive, self._with_header(send, "busy"))
+            return
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        slug = _SLUG.sub("_", scope["path"]).strip("_")[:60] or "root"
+        profile = RequestProfile(mode, f"{stamp}-{scope['method']}-{slug}-{uuid.uuid4().hex[:8]}")
+        token = _active.set(profile)
+        loop_profiler = cProfile.Profile() if profile.uses_cprofile else None
+        started = time.perf_counter()
+        try:
+            profile.start()
+            if loop_profiler is not None:
+                loop_profiler.enable()
+            await self.app(scope, receive, self._with_header(send, profile.name))
+        finally:
+            if loop_profiler is not None:
+                loop_profiler.disable()
+                profile.profiles.append(loop_profiler)
+            profile.stop()
+            _active.reset(token)
+            _busy.release()
+            paths = profile.save(settings.profiling_output_dir)
+            logger.info("Profiled %s %s in %.1f ms: %s", scope["method"], scope["path"],
+                        (time.perf_counter() - started) * 1000, ", ".join(paths))
+
+    @staticmethod
+    def _with_header(send, value: str):
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile", value.encode())]}
+            await send(message)
+        return send_with_header
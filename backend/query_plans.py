@@ -0,0 +1,144 @@
+"""Query-plan regression check for the repository layer.
+
+Runs every repository and progress query against a scratch database while
+tracing the SQL that reaches SQLite, then runs EXPLAIN QUERY PLAN on each
+distinct statement and fails if any of them scans a whole table.
+
+    python query_plans.py        # exits 1 and lists offending queries
+"""
+import os
+import re
+import sys
+import tempfile
+import database
+from datetime import date
+
+# Plan rows that mention SCAN but do not walk a user data table
+# (constant rows, the VALUES windows CTE, SQLite's one-row-per-table sequence)
+ALLOWED_SCANS = re.compile(r"^SCAN (CONSTANT ROW|\d+ CONSTANT ROWS|w|sqlite_sequence)\b")
+CHECKED_STATEMENTS = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE|INSERT\b.*\bSELECT)\b", re.IGNORECASE | re.DOTALL)
+
+
+def exercise_repositories():
+    """Call each repository/service read and write path once"""
+    from models import CategoryCreate, CategoryUpdate, CheckInCreate, GoalCreate, GoalUpdate, UserCreate
+    from repositories.category_repository import CategoryRepository
+    from repositories.checkin_repository import CheckInRepository
+    from repositories.data_version_repository import DataVersionRepository
+    from repositories.goal_repository import GoalRepository
+    from repositories.user_repository import UserRepository
+    from services import analytics
+    from services.import_service import ImportService
+    from services.progress_service import ProgressService
+    from config import settings
+
+    # One row per page, so the exports below also run their next-page queries
+    settings.export_chunk_size = 1
+    today = date.today().isoformat()
+    user = UserRepository.create(UserCreate(username="plan-check", password="plan-check"), password_hash="x")
+    user_id = user['id']
+    UserRepository.get_by_username("plan-check")
+    UserRepository.get_principal(user_id)
+    UserRepository.update_password_hash(user_id, "y")
+
+    category = CategoryRepository.create(CategoryCreate(title="Plans"), user_id)
+    CategoryRepository.get_all(user_id)
+    CategoryRepository.update(category['id'], CategoryUpdate(title="Plans 2"), user_id)
+    list(CategoryRepository.iter_all(user_id))
+
+    goal = GoalRepository.create(
+        GoalCreate(title="Plan", category_id=category['id'], frequency="weekly", target_value=3), user_id
+    )
+    GoalRepository.get_all(user_id)
+    GoalRepository.get_all(user_id, include_inactive=True)
+    GoalRepository.get_by_category(category['id'], user_id)
+    GoalRepository.get_by_frequency("weekly", user_id)
+    GoalRepository.update(goal['id'], GoalUpdate(target_value=4), user_id)
+    list(GoalRepository.iter_all(user_id))
+
+    checkin = CheckInRepository.create(CheckInCreate(goal_id=goal['id'], date=today), user_id)
+    CheckInRepository.create_many([CheckInCreate(goal_id=goal['id'], date=today, value=2)], user_id)
+    after = (today, "9999-12-31 00:00:00", 1 << 30)
+    CheckInRepository.get_by_date(today, user_id)
+    CheckInRepository.get_by_date(today, user_id, limit=10, after=after)
+    CheckInRepository.get_by_goal(goal['id'], user_id, today, today)
+    CheckInRepository.get_by_goal(goal['id'], user_id, limit=10, after=after)
+    CheckInRepository.get_by_date_range(today, today, user_id, limit=10, after=after)
+    CheckInRepository.get_day_details(today, user_id)
+    CheckInRepository.get_progress_in_window(goal['id'], today, today, user_id)
+    CheckInRepository.get_all_progress_in_window(today, today, user_id)
+    for mode in ("count", "value", "goals"):
+        CheckInRepository.get_year_summary(date.today().year, user_id, mode)
+    list(CheckInRepository.iter_all(user_id))
+    DataVersionRepository.get(user_id)
+
+    ProgressService.get_progress_by_frequency(user_id)
+    ProgressService.get_goal_progress(goal['id'], user_id)
+    ProgressService.get_year_grid(date.today().year, user_id)
+    for period in ("day", "week", "month"):
+        ProgressService.get_goal_history(goal['id'], user_id, period)
+    analytics.get_year_stats(date.today().year, user_id)
+    # One row for an existing goal, one that creates a goal and its category
+    ImportService.import_checkins(user_id, [
+        (1, {"goal_id": goal['id'], "date": today}, None),
+        (2, {"goal": "Imported plan", "category": "Imported plans", "date": today}, None),
+    ])
+
+    CheckInRepository.delete(checkin['id'], user_id)
+    GoalRepository.delete(goal['id'], user_id)
+    CategoryRepository.delete(category['id'], user_id)
+
+
+def collect_statements() -> list:
+    statements = {}
+
+    def trace(conn):
+        conn.set_trace_callback(
+            lambda sql: statements.setdefault(" ".join(sql.split()), None)
+        )
+
+    database.add_connection_hook(trace)
+    try:
+        exercise_repositories()
+    finally:
+        database.remove_connection_hook(trace)
+        database.close_write_queue()
+    return [sql for sql in statements if CHECKED_STATEMENTS.match(sql)]
+
+
+def find_full_scans(statements: list) -> list:
+    failures = []
+    with database.get_db() as conn:
+        for sql in statements:
+            plan = [row['detail'] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            scans = [step for step in plan if step.startswith("SCAN ") and not ALLOWED_SCANS.match(step)]
+            if scans:
+                failures.append((sql, plan))
+    return failures
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as scratch:
+        database.close_write_queue()
+        database.close_pool()
+        database.DATABASE = os.path.join(scratch, "plans.db")
+        try:
+            database.init_db()
+            # Reopen connections so every one of them gets the trace hook
+            database.close_pool()
+            statements = collect_statements()
+            failures = find_full_scans(statements)
+        finally:
+            database.close_write_queue()
+            database.close_pool()
+
+    print(f"Checked {len(statements)} statements")
+    for sql, plan in failures:
+        print(f"\nFULL SCAN: {sql}")
+        for step in plan:
+            print(f"    {step}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
-from database import get_db
+from cache import invalidate_user
+from database import get_db, iter_rows, run_write
+from repositories.data_version_repository import DataVersionRepository
 from models import Category, CategoryCreate, CategoryUpdate
-from typing import List, Optional
+from typing import Iterator, List, Optional
 import sqlite3
 
 class CategoryRepository:
@@ -17,6 +19,15 @@ class CategoryRepository:
             """, (user_id,))
             return [dict(row) for row in cursor.fetchall()]
     
+    @staticmethod
+    def iter_all(user_id: int) -> Iterator[dict]:
+        """Stream all categories for a user (used by exports)"""
+        return iter_rows("""
+            SELECT id, title, created_at
+            FROM categories
+            WHERE user_id = ?
+        """, (user_id,))
+    
     @staticmethod
     def get_by_id(category_id: int, user_id: int) -> Optional[dict]:
         """Get category by id, ensuring it belongs to the user"""
@@ -33,38 +44,51 @@ class CategoryRepository:
     @staticmethod
     def create(category: CategoryCreate, user_id: int) -> dict:
         """Create category for a specific user"""
-        with get_db() as conn:
+        def _insert(conn):
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO categories (user_id, title) 
                 VALUES (?, ?)
             """, (user_id, category.title))
-            conn.commit()
-            return CategoryRepository.get_by_id(cursor.lastrowid, user_id)
+            DataVersionRepository.bump(conn, user_id)
+            return cursor.lastrowid
+
+        return CategoryRepository.get_by_id(run_write(_insert), user_id)
     
     @staticmethod
     def update(category_id: int, category: CategoryUpdate, user_id: int) -> Optional[dict]:
         """Update category, ensuring it belongs to the user"""
-        with get_db() as conn:
+        def _update(conn):
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE categories 
                 SET title = ? 
                 WHERE id = ? AND user_id = ?
             """, (category.title, category_id, user_id))
-            conn.commit()
             if cursor.rowcount > 0:
-                return CategoryRepository.get_by_id(category_id, user_id)
-            return None
+                DataVersionRepository.bump(conn, user_id)
+            return cursor.rowcount
+
+        if run_write(_update) > 0:
+            # Day details embed category titles
+            invalidate_user(user_id)
+            return CategoryRepository.get_by_id(category_id, user_id)
+        return None
     
     @staticmethod
     def delete(category_id: int, user_id: int) -> bool:
         """Delete category, ensuring it belongs to the user"""
-        with get_db() as conn:
+        def _delete(conn):
             cursor = conn.cursor()
             cursor.execute("""
                 DELETE FROM categories 
                 WHERE id = ? AND user_id = ?
             """, (category_id, user_id))
-            conn.commit()
-            return cursor.rowcount > 0
+            if cursor.rowcount > 0:
+                DataVersionRepository.bump(conn, user_id)
+            return cursor.rowcount
+
+        if run_write(_delete) > 0:
+            invalidate_user(user_id)
+            return True
+        return False
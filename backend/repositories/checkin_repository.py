@@ -1,26 +1,104 @@
-from database import get_db
+from cache import invalidate_user
+from database import get_db, iter_rows, run_write
+from repositories.data_version_repository import DataVersionRepository
 from models import CheckIn, CheckInCreate
-from typing import List, Optional
+from pagination import Keyset
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import date, datetime
 
 class CheckInRepository:
     @staticmethod
-    def get_by_date(check_date: str, user_id: int) -> List[dict]:
-        """Get all check-ins for a specific date and user"""
+    def apply_rollup_deltas(conn, deltas: List[Tuple[int, int, str, int, int]]):
+        """Add (user_id, goal_id, date, value_delta, count_delta) rows to the daily rollup.
+
+        Runs on the caller's connection so it commits together with the
+        check-in write; days whose count drops to zero are removed.
+        """
+        conn.executemany("""
+            INSERT INTO checkin_daily_rollup (user_id, goal_id, date, total_value, count)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, goal_id, date) DO UPDATE SET
+                total_value = total_value + excluded.total_value,
+                count = count + excluded.count
+        """, deltas)
+        emptied = [(user_id, goal_id, day) for user_id, goal_id, day, _, count in deltas if count < 0]
+        if emptied:
+            conn.executemany("""
+                DELETE FROM checkin_daily_rollup
+                WHERE user_id = ? AND goal_id = ? AND date = ? AND count <= 0
+            """, emptied)
+    
+    @staticmethod
+    def iter_all(user_id: int) -> Iterator[dict]:
+        """Stream every check-in for a user in date order (used by exports)"""
+        return iter_rows("""
+            SELECT id, goal_id, date, value, note, created_at
+            FROM checkins
+            WHERE user_id = ?
+        """, (user_id,), order_by=("date", "created_at", "id"))
+    
+    @staticmethod
+    def _keyset_clause(query: str, params: list, limit: Optional[int], after: Optional[Keyset],
+                       single_date: bool = False) -> str:
+        """Append the keyset predicate, newest-first ordering and limit to a query.
+
+        With `single_date` the query already pins one date, so only
+        (created_at, id) is compared and the date index stays an equality.
+        """
+        if after is not None:
+            if single_date:
+                query += " AND (created_at, id) < (?, ?)"
+                params.extend(after[1:])
+            else:
+                query += " AND (date, created_at, id) < (?, ?, ?)"
+                params.extend(after)
+        query += " ORDER BY date DESC, created_at DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query
+    
+    @staticmethod
+    def get_by_date(check_date: str, user_id: int, limit: Optional[int] = None,
+                    after: Optional[Keyset] = None) -> List[dict]:
+        """Get check-ins for a specific date and user, newest first.
+
+        `limit` and `after` (a keyset from pagination.decode_cursor) select
+        one page; without them every matching row is returned.
+        """
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
+            params = [check_date, user_id]
+            query = CheckInRepository._keyset_clause("""
                 SELECT id, user_id, goal_id, date, value, note, created_at
                 FROM checkins
                 WHERE date = ? AND user_id = ?
-                ORDER BY created_at DESC
+            """, params, limit, after, single_date=True)
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def get_day_details(check_date: str, user_id: int) -> List[dict]:
+        """Get a day's check-ins joined with their goal and category"""
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT c.id, c.user_id, c.goal_id, c.date, c.value, c.note, c.created_at,
+                       g.title AS goal_title, g.frequency AS goal_frequency,
+                       g.category_id, cat.title AS category_title
+                FROM checkins c
+                LEFT JOIN goals g ON g.id = c.goal_id AND g.user_id = c.user_id
+                LEFT JOIN categories cat ON cat.id = g.category_id AND cat.user_id = c.user_id
+                WHERE c.date = ? AND c.user_id = ?
+                ORDER BY c.created_at DESC
             """, (check_date, user_id))
             return [dict(row) for row in cursor.fetchall()]
     
     @staticmethod
     def get_by_goal(goal_id: int, user_id: int, start_date: Optional[str] = None, 
-                    end_date: Optional[str] = None) -> List[dict]:
-        """Get check-ins for a specific goal and user"""
+                    end_date: Optional[str] = None, limit: Optional[int] = None,
+                    after: Optional[Keyset] = None) -> List[dict]:
+        """Get check-ins for a specific goal and user, optionally one keyset page"""
         with get_db() as conn:
             cursor = conn.cursor()
             query = """
@@ -37,83 +115,290 @@ class CheckInRepository:
                 query += " AND date <= ?"
                 params.append(end_date)
             
-            query += " ORDER BY date DESC, created_at DESC"
+            query = CheckInRepository._keyset_clause(query, params, limit, after)
             cursor.execute(query, params)
             return [dict(row) for row in cursor.fetchall()]
     
     @staticmethod
-    def get_by_date_range(start_date: str, end_date: str, user_id: int) -> List[dict]:
-        """Get all check-ins within a date range for a user"""
+    def get_by_date_range(start_date: str, end_date: str, user_id: int,
+                          limit: Optional[int] = None, after: Optional[Keyset] = None) -> List[dict]:
+        """Get check-ins within a date range for a user, optionally one keyset page"""
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
+            params = [start_date, end_date, user_id]
+            query = CheckInRepository._keyset_clause("""
                 SELECT id, user_id, goal_id, date, value, note, created_at
                 FROM checkins
                 WHERE date BETWEEN ? AND ? AND user_id = ?
-                ORDER BY date DESC, created_at DESC
-            """, (start_date, end_date, user_id))
+            """, params, limit, after)
+            cursor.execute(query, params)
             return [dict(row) for row in cursor.fetchall()]
     
     @staticmethod
     def create(checkin: CheckInCreate, user_id: int) -> dict:
         """Always insert a new check-in event for a user"""
-        with get_db() as conn:
+        def _insert(conn):
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO checkins (user_id, goal_id, date, value, note)
                 VALUES (?, ?, ?, ?, ?)
             """, (user_id, checkin.goal_id, checkin.date, checkin.value, checkin.note))
-            conn.commit()
+            CheckInRepository.apply_rollup_deltas(
+                conn, [(user_id, checkin.goal_id, checkin.date, checkin.value, 1)]
+            )
+            DataVersionRepository.bump(conn, user_id)
+            return cursor.lastrowid
+
+        checkin_id = run_write(_insert)
+        invalidate_user(user_id)
+        return {
+            "id": checkin_id,
+            "user_id": user_id,
+            "goal_id": checkin.goal_id,
+            "date": checkin.date,
+            "value": checkin.value,
+            "note": checkin.note,
+            "created_at": datetime.now().isoformat()
+        }
+    
+    @staticmethod
+    def create_many(checkins: List[CheckInCreate], user_id: int) -> List[Optional[dict]]:
+        """Insert many check-ins in one transaction.
+
+        Goal ownership is checked with a single query; the result is aligned
+        with the input and holds None for check-ins whose goal the user
+        does not own.
+        """
+        def _insert(conn):
+            cursor = conn.cursor()
+            goal_ids = sorted({checkin.goal_id for checkin in checkins})
+            placeholders = ", ".join("?" for _ in goal_ids)
+            cursor.execute(f"""
+                SELECT id FROM goals
+                WHERE user_id = ? AND id IN ({placeholders})
+            """, [user_id, *goal_ids])
+            owned = {row[0] for row in cursor.fetchall()}
+            
+            accepted = [checkin for checkin in checkins if checkin.goal_id in owned]
+            if not accepted:
+                return owned, None
+            
+            cursor.executemany("""
+                INSERT INTO checkins (user_id, goal_id, date, value, note)
+                VALUES (?, ?, ?, ?, ?)
+            """, [(user_id, c.goal_id, c.date, c.value, c.note) for c in accepted])
+            # AUTOINCREMENT ids are contiguous while this transaction holds the write lock
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'checkins'")
+            first_id = cursor.fetchone()[0] - len(accepted) + 1
             
-            checkin_id = cursor.lastrowid
-            return {
-                "id": checkin_id,
+            deltas = {}
+            for c in accepted:
+                value, count = deltas.get((c.goal_id, c.date), (0, 0))
+                deltas[(c.goal_id, c.date)] = (value + c.value, count + 1)
+            CheckInRepository.apply_rollup_deltas(
+                conn,
+                [(user_id, goal_id, day, value, count) for (goal_id, day), (value, count) in deltas.items()]
+            )
+            DataVersionRepository.bump(conn, user_id)
+            return owned, first_id
+        
+        if not checkins:
+            return []
+        
+        owned, next_id = run_write(_insert)
+        if next_id is not None:
+            invalidate_user(user_id)
+        
+        created_at = datetime.now().isoformat()
+        results = []
+        for checkin in checkins:
+            if checkin.goal_id not in owned:
+                results.append(None)
+                continue
+            results.append({
+                "id": next_id,
                 "user_id": user_id,
                 "goal_id": checkin.goal_id,
                 "date": checkin.date,
                 "value": checkin.value,
                 "note": checkin.note,
-                "created_at": datetime.now().isoformat()
-            }
+                "created_at": created_at
+            })
+            next_id += 1
+        return results
     
     @staticmethod
     def delete(checkin_id: int, user_id: int) -> bool:
         """Delete a specific check-in event, ensuring it belongs to the user"""
-        with get_db() as conn:
+        def _delete(conn):
             cursor = conn.cursor()
+            cursor.execute("""
+                SELECT goal_id, date, value
+                FROM checkins
+                WHERE id = ? AND user_id = ?
+            """, (checkin_id, user_id))
+            row = cursor.fetchone()
+            if not row:
+                return 0
+            
             cursor.execute("""
                 DELETE FROM checkins 
                 WHERE id = ? AND user_id = ?
             """, (checkin_id, user_id))
-            conn.commit()
-            return cursor.rowcount > 0
+            CheckInRepository.apply_rollup_deltas(
+                conn, [(user_id, row['goal_id'], row['date'], -row['value'], -1)]
+            )
+            DataVersionRepository.bump(conn, user_id)
+            return cursor.rowcount
+
+        if run_write(_delete) > 0:
+            invalidate_user(user_id)
+            return True
+        return False
     
     @staticmethod
-    def get_year_summary(year: int, user_id: int) -> dict:
-        """Get check-in count for each day of the year for a user"""
+    def get_year_summary(year: int, user_id: int, mode: str = 'count') -> dict:
+        """Get per-day check-in totals of the year for a user.
+
+        mode 'count' maps date -> number of check-ins, 'value' maps
+        date -> summed value and 'goals' maps date -> {goal_id: summed value}.
+        Reads the daily rollup with range predicates on date, so only the
+        requested year's rows are touched.
+        """
+        start_date = f"{year:04d}-01-01"
+        end_date = f"{year + 1:04d}-01-01"
+        
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT date, COUNT(*) as count
-                FROM checkins
-                WHERE strftime('%Y', date) = ? AND user_id = ?
+            if mode == 'goals':
+                cursor.execute("""
+                    SELECT date, goal_id, SUM(total_value) as total
+                    FROM checkin_daily_rollup
+                    WHERE user_id = ? AND date >= ? AND date < ?
+                    GROUP BY date, goal_id
+                    ORDER BY date
+                """, (user_id, start_date, end_date))
+                
+                result = {}
+                for row in cursor.fetchall():
+                    result.setdefault(row[0], {})[row[1]] = row[2]
+                return result
+            
+            aggregate = "SUM(total_value)" if mode == 'value' else "SUM(count)"
+            cursor.execute(f"""
+                SELECT date, {aggregate} as total
+                FROM checkin_daily_rollup
+                WHERE user_id = ? AND date >= ? AND date < ?
                 GROUP BY date
                 ORDER BY date
-            """, (str(year), user_id))
+            """, (user_id, start_date, end_date))
             
             result = {}
             for row in cursor.fetchall():
                 result[row[0]] = row[1]
             return result
     
+    @staticmethod
+    def get_year_grid(year: int, user_id: int) -> List[dict]:
+        """Get (goal_id, day, total) rows for a user's year in one query.
+
+        `day` is the 0-based offset from January 1st, computed in SQL; it is
+        NULL for active goals without check-ins (so the caller can still
+        emit an all-zero row for them) and for unparseable stored dates.
+        """
+        start = f"{year:04d}-01-01"
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT g.id AS goal_id,
+                       CAST(julianday(r.date) - julianday(?) AS INTEGER) AS day,
+                       r.total_value AS total
+                FROM goals g
+                LEFT JOIN checkin_daily_rollup r
+                    ON r.user_id = g.user_id
+                    AND r.goal_id = g.id
+                    AND r.date >= ? AND r.date < ?
+                WHERE g.user_id = ? AND (g.is_active = 1 OR r.date IS NOT NULL)
+            """, (start, start, f"{year + 1:04d}-01-01", user_id))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def get_year_daily_totals(year: int, user_id: int) -> List[tuple]:
+        """Get (goal_id, day_of_year, total) tuples for a user's year.
+        
+        Days are 0-based offsets from January 1st; rows whose stored date
+        SQLite cannot parse are left out. Rows are plain tuples so they can
+        be loaded straight into arrays (used by analytics).
+        """
+        start = f"{year:04d}-01-01"
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute("""
+                SELECT r.goal_id,
+                       CAST(julianday(r.date) - julianday(?) AS INTEGER) AS day,
+                       r.total_value
+                FROM checkin_daily_rollup r
+                WHERE r.user_id = ? AND r.date >= ? AND r.date < ? AND julianday(r.date) IS NOT NULL
+            """, (start, user_id, start, f"{year + 1:04d}-01-01"))
+            return cursor.fetchall()
+    
+    # SQL expression mapping a rollup date to the first day of its bucket
+    _PERIOD_BUCKETS = {
+        'day': "r.date",
+        # ? is the first day of the week in strftime('%w') numbering (0 = Sunday)
+        'week': "date(r.date, '-' || ((CAST(strftime('%w', r.date) AS INTEGER) - ? + 7) % 7) || ' days')",
+        'month': "strftime('%Y-%m-01', r.date)",
+    }
+    
+    @staticmethod
+    def get_period_totals(goal_id: int, user_id: int, period: str, start_date: str, end_date: str,
+                          first_weekday: int = 0) -> List[dict]:
+        """Get (period_start, total, checkins) per day/week/month for one goal.
+        
+        Periods are bucketed in SQL over the rollup, so any range costs one
+        query. `first_weekday` is 0 = Monday ... 6 = Sunday; periods without
+        check-ins are not returned.
+        """
+        bucket = CheckInRepository._PERIOD_BUCKETS[period]
+        params = [(first_weekday + 1) % 7] if period == 'week' else []
+        params.extend([user_id, goal_id, start_date, end_date])
+        
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {bucket} AS period_start,
+                       SUM(r.total_value) AS total,
+                       SUM(r.count) AS checkins
+                FROM checkin_daily_rollup r
+                WHERE r.user_id = ? AND r.goal_id = ? AND r.date BETWEEN ? AND ?
+                GROUP BY period_start
+                ORDER BY period_start
+            """, params)
+            return [dict(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def get_first_date(goal_id: int, user_id: int) -> Optional[str]:
+        """Get the earliest valid check-in date for a goal, or None"""
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT date FROM checkin_daily_rollup
+                WHERE user_id = ? AND goal_id = ? AND julianday(date) IS NOT NULL
+                ORDER BY date
+                LIMIT 1
+            """, (user_id, goal_id))
+            row = cursor.fetchone()
+            return row[0] if row else None
+    
     @staticmethod
     def get_progress_in_window(goal_id: int, start_date: str, end_date: str, user_id: int) -> int:
         """Calculate total progress for a goal in a time window for a user"""
         with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT COALESCE(SUM(value), 0) as total
-                FROM checkins
+                SELECT COALESCE(SUM(total_value), 0) as total
+                FROM checkin_daily_rollup
                 WHERE goal_id = ? AND date BETWEEN ? AND ? AND user_id = ?
             """, (goal_id, start_date, end_date, user_id))
             return cursor.fetchone()[0]
@@ -124,8 +409,8 @@ class CheckInRepository:
         with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT goal_id, SUM(value) as total
-                FROM checkins
+                SELECT goal_id, SUM(total_value) as total
+                FROM checkin_daily_rollup
                 WHERE date BETWEEN ? AND ? AND user_id = ?
                 GROUP BY goal_id
             """, (start_date, end_date, user_id))
@@ -133,4 +418,42 @@ class CheckInRepository:
             result = {}
             for row in cursor.fetchall():
                 result[row[0]] = row[1]
-            return result
\ No newline at end of file
+            return result
+    
+    @staticmethod
+    def get_active_goal_progress(windows: Dict[str, Tuple[str, str]], user_id: int) -> List[dict]:
+        """Get every active goal with its total inside its frequency's window.
+        
+        `windows` maps frequency -> (start_date, end_date). Custom goals
+        narrow their window to their own start/end dates where set. All
+        goals are summed in one grouped query instead of one query per goal.
+        """
+        if not windows:
+            return []
+        
+        values = ", ".join("(?, ?, ?)" for _ in windows)
+        params = [value for freq, (start, end) in windows.items() for value in (freq, start, end)]
+        params.append(user_id)
+        
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                WITH windows(frequency, start_date, end_date) AS (VALUES {values})
+                SELECT g.id, g.title, g.category_id, g.frequency, g.target_value,
+                       g.start_date, g.end_date,
+                       COALESCE(SUM(r.total_value), 0) AS total
+                FROM goals g
+                JOIN windows w ON w.frequency = g.frequency
+                LEFT JOIN checkin_daily_rollup r
+                    ON r.user_id = g.user_id
+                    AND r.goal_id = g.id
+                    AND r.date BETWEEN
+                        CASE WHEN g.frequency = 'custom' AND g.start_date IS NOT NULL
+                             THEN MAX(w.start_date, g.start_date) ELSE w.start_date END
+                    AND CASE WHEN g.frequency = 'custom' AND g.end_date IS NOT NULL
+                             THEN MIN(w.end_date, g.end_date) ELSE w.end_date END
+                WHERE g.user_id = ? AND g.is_active = 1
+                GROUP BY g.id
+                ORDER BY g.created_at DESC
+            """, params)
+            return [dict(row) for row in cursor.fetchall()]
@@ -0,0 +1,21 @@
+from database import get_db
+
+class DataVersionRepository:
+    @staticmethod
+    def get(user_id: int) -> int:
+        """Get the current data version for a user (0 if never written)"""
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT version FROM user_data_versions WHERE user_id = ?
+            """, (user_id,))
+            row = cursor.fetchone()
+            return row[0] if row else 0
+    
+    @staticmethod
+    def bump(conn, user_id: int):
+        """Increment a user's data version inside the caller's write transaction"""
+        conn.execute("""
+            INSERT INTO user_data_versions (user_id, version) VALUES (?, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1
+        """, (user_id,))
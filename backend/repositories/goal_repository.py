@@ -1,6 +1,8 @@
-from database import get_db
+from cache import invalidate_user
+from database import get_db, iter_rows, run_write
+from repositories.data_version_repository import DataVersionRepository
 from models import Goal, GoalCreate, GoalUpdate
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 class GoalRepository:
     @staticmethod
@@ -9,7 +11,7 @@ class GoalRepository:
         with get_db() as conn:
             cursor = conn.cursor()
             query = """
-                SELECT id, user_id, title, category_id, frequency, target_value, is_active
+                SELECT id, user_id, title, category_id, frequency, target_value, is_active, start_date, end_date
                 FROM goals
                 WHERE user_id = ?
             """
@@ -20,13 +22,23 @@ class GoalRepository:
             cursor.execute(query, (user_id,))
             return [dict(row) for row in cursor.fetchall()]
     
+    @staticmethod
+    def iter_all(user_id: int) -> Iterator[dict]:
+        """Stream all goals for a user by id, including inactive ones (used by exports and analytics)"""
+        return iter_rows("""
+            SELECT id, title, category_id, frequency, target_value, is_active, start_date, end_date, created_at
+            FROM goals
+            WHERE user_id = ?
+        """, (user_id,))
+    
     @staticmethod
     def get_by_id(goal_id: int, user_id: int) -> Optional[dict]:
         """Get goal by id, ensuring it belongs to the user"""
         with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT id, user_id, title, category_id, frequency, target_value, is_active
+                SELECT id, user_id, title, category_id, frequency, target_value, is_active, start_date, end_date,
+                       created_at
                 FROM goals 
                 WHERE id = ? AND user_id = ?
             """, (goal_id, user_id))
@@ -39,7 +51,7 @@ class GoalRepository:
         with get_db() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT id, user_id, title, category_id, frequency, target_value, is_active
+                SELECT id, user_id, title, category_id, frequency, target_value, is_active, start_date, end_date
                 FROM goals
                 WHERE category_id = ? AND user_id = ? AND is_active = 1
                 ORDER BY created_at DESC
@@ -52,7 +64,7 @@ class GoalRepository:
         with get_db() as conn:
             cursor = conn.cursor()
             query = """
-                SELECT id, user_id, title, category_id, frequency, target_value, is_active
+                SELECT id, user_id, title, category_id, frequency, target_value, is_active, start_date, end_date
                 FROM goals
                 WHERE frequency = ? AND user_id = ?
             """
@@ -66,18 +78,27 @@ class GoalRepository:
     @staticmethod
     def create(goal: GoalCreate, user_id: int) -> dict:
         """Create goal for a specific user"""
-        with get_db() as conn:
+        def _insert(conn):
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO goals (user_id, title, category_id, frequency, target_value)
-                VALUES (?, ?, ?, ?, ?)
-            """, (user_id, goal.title, goal.category_id, goal.frequency, goal.target_value))
-            conn.commit()
-            return GoalRepository.get_by_id(cursor.lastrowid, user_id)
+                INSERT INTO goals (user_id, title, category_id, frequency, target_value, start_date, end_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (user_id, goal.title, goal.category_id, goal.frequency, goal.target_value,
+                  goal.start_date, goal.end_date))
+            DataVersionRepository.bump(conn, user_id)
+            return cursor.lastrowid
+
+        goal_id = run_write(_insert)
+        invalidate_user(user_id)
+        return GoalRepository.get_by_id(goal_id, user_id)
     
     @staticmethod
     def update(goal_id: int, goal: GoalUpdate, user_id: int) -> Optional[dict]:
-        """Update goal, ensuring it belongs to the user"""
+        """Update goal, ensuring it belongs to the user.
+        
+        Raises ValueError (and changes nothing) if the resulting end_date
+        would be before start_date.
+        """
         update_fields = []
         params = []
         
@@ -96,6 +117,11 @@ class GoalRepository:
         if goal.is_active is not None:
             update_fields.append("is_active = ?")
             params.append(goal.is_active)
+        # Dates can be cleared, so any date sent (even null) is written
+        for field in ("start_date", "end_date"):
+            if field in goal.model_fields_set:
+                update_fields.append(f"{field} = ?")
+                params.append(getattr(goal, field))
         
         if not update_fields:
             return GoalRepository.get_by_id(goal_id, user_id)
@@ -103,23 +129,40 @@ class GoalRepository:
         params.extend([goal_id, user_id])
         query = f"UPDATE goals SET {', '.join(update_fields)} WHERE id = ? AND user_id = ?"
         
-        with get_db() as conn:
+        def _update(conn):
             cursor = conn.cursor()
             cursor.execute(query, params)
-            conn.commit()
-            if cursor.rowcount > 0:
-                return GoalRepository.get_by_id(goal_id, user_id)
-            return None
+            updated = cursor.rowcount
+            if updated > 0:
+                # A partial update can pair a new date with the stored one
+                start_date, end_date = conn.execute(
+                    "SELECT start_date, end_date FROM goals WHERE id = ?", (goal_id,)
+                ).fetchone()
+                if start_date and end_date and end_date < start_date:
+                    raise ValueError("end_date must not be before start_date")
+                DataVersionRepository.bump(conn, user_id)
+            return updated
+
+        if run_write(_update) > 0:
+            invalidate_user(user_id)
+            return GoalRepository.get_by_id(goal_id, user_id)
+        return None
     
     @staticmethod
     def delete(goal_id: int, user_id: int) -> bool:
         """Soft delete goal, ensuring it belongs to the user"""
-        with get_db() as conn:
+        def _deactivate(conn):
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE goals 
                 SET is_active = 0 
                 WHERE id = ? AND user_id = ?
             """, (goal_id, user_id))
-            conn.commit()
-            return cursor.rowcount > 0
+            if cursor.rowcount > 0:
+                DataVersionRepository.bump(conn, user_id)
+            return cursor.rowcount
+
+        if run_write(_deactivate) > 0:
+            invalidate_user(user_id)
+            return True
+        return False
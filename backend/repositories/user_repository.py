@@ -1,6 +1,9 @@
-from database import get_db
+from cache import principal_cache
+from database import get_db, run_write
+from repositories.data_version_repository import DataVersionRepository
 from models import User, UserCreate
-from auth import hash_password, verify_password
+from auth import dummy_password_hash, hash_password, hash_password_async, needs_rehash, verify_password_async
+from concurrency import run_db
 from typing import List, Optional
 import sqlite3
 
@@ -16,6 +19,16 @@ class UserRepository:
             row = cursor.fetchone()
             return dict(row) if row else None
     
+    @staticmethod
+    def get_principal(user_id: int) -> Optional[dict]:
+        """Get user by id through the principal cache (users are never modified)"""
+        user = principal_cache.get(user_id)
+        if user is None:
+            user = UserRepository.get_by_id(user_id)
+            if user:
+                principal_cache.set(user_id, user)
+        return user
+    
     @staticmethod
     def get_by_username(username: str) -> Optional[dict]:
         with get_db() as conn:
@@ -28,9 +41,15 @@ class UserRepository:
             return dict(row) if row else None
     
     @staticmethod
-    def create(user: UserCreate) -> dict:
-        """Create a new user and seed default categories with user_id"""
-        with get_db() as conn:
+    def create(user: UserCreate, password_hash: Optional[str] = None) -> dict:
+        """Create a new user and seed default categories with user_id.
+
+        Pass a precomputed `password_hash` to keep KDF work out of this call.
+        """
+        if password_hash is None:
+            password_hash = hash_password(user.password)
+
+        def _insert(conn):
             cursor = conn.cursor()
             
             # Check if username already exists
@@ -39,7 +58,6 @@ class UserRepository:
                 raise ValueError("Username already taken")
             
             # Create user
-            password_hash = hash_password(user.password)
             cursor.execute("""
                 INSERT INTO users (username, password_hash)
                 VALUES (?, ?)
@@ -56,20 +74,44 @@ class UserRepository:
                     INSERT INTO categories (user_id, title) VALUES (?, ?)
                 """, (user_id, category_title))
             
-            conn.commit()
-            
-            return UserRepository.get_by_id(user_id)
+            DataVersionRepository.bump(conn, user_id)
+            return user_id
+
+        return UserRepository.get_by_id(run_write(_insert))
+    
+    @staticmethod
+    def update_password_hash(user_id: int, password_hash: str) -> bool:
+        """Replace a user's stored password hash"""
+        def _update(conn):
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE users SET password_hash = ? WHERE id = ?
+            """, (password_hash, user_id))
+            return cursor.rowcount
+
+        return run_write(_update) > 0
     
     @staticmethod
-    def authenticate(username: str, password: str) -> Optional[dict]:
-        """Authenticate user and return user data if valid"""
-        user = UserRepository.get_by_username(username)
+    async def authenticate(username: str, password: str) -> Optional[dict]:
+        """Authenticate user and return user data if valid.
+
+        Async because it coordinates two pools: lookups run on the DB pool
+        and the KDF on the password hashing pool. Legacy or outdated hashes
+        are transparently replaced after a successful login.
+        """
+        user = await run_db(UserRepository.get_by_username, username)
         if not user:
+            # Same KDF work as a wrong password, so timing doesn't reveal usernames
+            await verify_password_async(password, dummy_password_hash())
             return None
         
-        if not verify_password(password, user['password_hash']):
+        if not await verify_password_async(password, user['password_hash']):
             return None
         
+        if needs_rehash(user['password_hash']):
+            new_hash = await hash_password_async(password)
+            await run_db(UserRepository.update_password_hash, user['id'], new_hash)
+        
         # Remove password_hash from response
         del user['password_hash']
         return user
\ No newline at end of file
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from models import UserCreate, UserLogin, User, UserResponse
 from repositories.user_repository import UserRepository
-from auth import create_access_token
+from auth import create_access_token, hash_password_async
+from concurrency import run_db
 from dependencies import get_current_user
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -13,7 +14,8 @@ async def signup(user_data: UserCreate):
     Creates user account and seeds default categories.
     """
     try:
-        user = UserRepository.create(user_data)
+        password_hash = await hash_password_async(user_data.password)
+        user = await run_db(UserRepository.create, user_data, password_hash)
         token = create_access_token(user['id'], user['username'])
         
         return {
@@ -37,7 +39,7 @@ async def login(credentials: UserLogin):
     Login with username and password.
     Returns user data and JWT token.
     """
-    user = UserRepository.authenticate(credentials.username, credentials.password)
+    user = await UserRepository.authenticate(credentials.username, credentials.password)
     
     if not user:
         raise HTTPException(
@@ -59,7 +61,7 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     Get current logged-in user information.
     Requires valid JWT token.
     """
-    user = UserRepository.get_by_id(current_user['user_id'])
+    user = await run_db(UserRepository.get_principal, current_user['user_id'])
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
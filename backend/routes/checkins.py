@@ -1,39 +1,92 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from models import CheckIn, CheckInCreate
+from fastapi import APIRouter, HTTPException, Query, Depends, Response
+from models import CheckIn, CheckInCreate, CheckInBatchCreate, CheckInBatchResult, validation_error_message
+from pydantic import ValidationError
 from repositories.checkin_repository import CheckInRepository
-from dependencies import get_current_user
+from concurrency import run_db
+from config import settings
+from dependencies import conditional_get, get_current_user
+from pagination import fetch_page
 from typing import List, Optional
 from datetime import date
 
 router = APIRouter(prefix="/checkins", tags=["checkins"])
 
-@router.get("/today", response_model=List[CheckIn])
-async def get_today_checkins(current_user: dict = Depends(get_current_user)):
+PAGE_LIMIT = Query(None, ge=1, le=1000, description="Page size; enables keyset pagination")
+PAGE_CURSOR = Query(None, description="X-Next-Cursor value from the previous page")
+
+async def list_checkins(response: Response, fetch, limit: Optional[int], cursor: Optional[str]):
+    """
+    Run a check-in listing unpaged (no limit or cursor) or as one keyset page.
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    if limit is None and cursor is None:
+        return await run_db(fetch, None, None)
+    
+    try:
+        rows, next_cursor = await run_db(
+            fetch_page, fetch, limit or settings.page_size_default, cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+@router.get("/today", response_model=List[CheckIn], dependencies=[Depends(conditional_get)])
+async def get_today_checkins(
+    response: Response,
+    limit: Optional[int] = PAGE_LIMIT,
+    cursor: Optional[str] = PAGE_CURSOR,
+    current_user: dict = Depends(get_current_user)
+):
     """Get all check-ins for today for the current user"""
     today = date.today().isoformat()
-    return CheckInRepository.get_by_date(today, current_user['user_id'])
+    return await list_checkins(
+        response,
+        lambda page_limit, after: CheckInRepository.get_by_date(
+            today, current_user['user_id'], page_limit, after
+        ),
+        limit,
+        cursor
+    )
 
-@router.get("/date/{check_date}", response_model=List[CheckIn])
+@router.get("/date/{check_date}", response_model=List[CheckIn], dependencies=[Depends(conditional_get)])
 async def get_checkins_by_date(
     check_date: str, 
+    response: Response,
+    limit: Optional[int] = PAGE_LIMIT,
+    cursor: Optional[str] = PAGE_CURSOR,
     current_user: dict = Depends(get_current_user)
 ):
     """Get all check-ins for a specific date for the current user"""
-    return CheckInRepository.get_by_date(check_date, current_user['user_id'])
+    return await list_checkins(
+        response,
+        lambda page_limit, after: CheckInRepository.get_by_date(
+            check_date, current_user['user_id'], page_limit, after
+        ),
+        limit,
+        cursor
+    )
 
-@router.get("/goal/{goal_id}", response_model=List[CheckIn])
+@router.get("/goal/{goal_id}", response_model=List[CheckIn], dependencies=[Depends(conditional_get)])
 async def get_checkins_by_goal(
     goal_id: int,
+    response: Response,
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
+    limit: Optional[int] = PAGE_LIMIT,
+    cursor: Optional[str] = PAGE_CURSOR,
     current_user: dict = Depends(get_current_user)
 ):
     """Get all check-ins for a specific goal (user must own goal)"""
-    return CheckInRepository.get_by_goal(
-        goal_id, 
-        current_user['user_id'], 
-        start_date, 
-        end_date
+    return await list_checkins(
+        response,
+        lambda page_limit, after: CheckInRepository.get_by_goal(
+            goal_id, current_user['user_id'], start_date, end_date, page_limit, after
+        ),
+        limit,
+        cursor
     )
 
 @router.post("", response_model=CheckIn, status_code=201)
@@ -46,7 +99,43 @@ async def create_checkin(
     ALWAYS inserts a new row - no update logic.
     Multiple check-ins per day per goal are allowed.
     """
-    return CheckInRepository.create(checkin, current_user['user_id'])
+    return await run_db(CheckInRepository.create, checkin, current_user['user_id'])
+
+@router.post("/batch", response_model=CheckInBatchResult)
+async def create_checkins_batch(
+    batch: CheckInBatchCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Create many check-in events in one transaction (e.g. offline replay).
+    Each item is validated on its own; the response reports per-item results
+    in input order, and only items for goals the user owns are inserted.
+    """
+    results = [None] * len(batch.items)
+    valid = []
+    for index, item in enumerate(batch.items):
+        try:
+            valid.append((index, CheckInCreate.model_validate(item)))
+        except ValidationError as e:
+            results[index] = {"index": index, "status": "invalid", "error": validation_error_message(e, "item")}
+    
+    created = await run_db(
+        CheckInRepository.create_many,
+        [checkin for _, checkin in valid],
+        current_user['user_id']
+    )
+    for (index, _), checkin in zip(valid, created):
+        if checkin is None:
+            results[index] = {"index": index, "status": "goal_not_found", "error": "Goal not found"}
+        else:
+            results[index] = {"index": index, "status": "created", "checkin": checkin}
+    
+    created_count = sum(1 for result in results if result["status"] == "created")
+    return {
+        "created": created_count,
+        "failed": len(results) - created_count,
+        "results": results
+    }
 
 @router.delete("/{checkin_id}", status_code=204)
 async def delete_checkin(
@@ -54,5 +143,5 @@ async def delete_checkin(
     current_user: dict = Depends(get_current_user)
 ):
     """Delete a specific check-in event (user must own it)"""
-    if not CheckInRepository.delete(checkin_id, current_user['user_id']):
+    if not await run_db(CheckInRepository.delete, checkin_id, current_user['user_id']):
         raise HTTPException(status_code=404, detail="Check-in not found")
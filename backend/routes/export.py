@@ -0,0 +1,93 @@
+from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import StreamingResponse
+from repositories.category_repository import CategoryRepository
+from repositories.goal_repository import GoalRepository
+from repositories.checkin_repository import CheckInRepository
+from concurrency import run_db
+from dependencies import get_current_user
+from itertools import islice
+from typing import Iterator, Optional
+import csv
+import io
+import json
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+EXPORT_TABLES = {
+    "categories": CategoryRepository.iter_all,
+    "goals": GoalRepository.iter_all,
+    "checkins": CheckInRepository.iter_all,
+}
+
+# CSV headers; must match the columns each iter_all selects
+EXPORT_COLUMNS = {
+    "categories": ["id", "title", "created_at"],
+    "goals": ["id", "title", "category_id", "frequency", "target_value", "is_active",
+              "start_date", "end_date", "created_at"],
+    "checkins": ["id", "goal_id", "date", "value", "note", "created_at"],
+}
+
+LINES_PER_CHUNK = 500
+
+def ndjson_lines(user_id: int, tables: list) -> Iterator[str]:
+    """One JSON object per line, tagged with the table it came from"""
+    for table in tables:
+        for row in EXPORT_TABLES[table](user_id):
+            yield json.dumps({"table": table, **row}) + "\n"
+
+def csv_lines(user_id: int, table: str) -> Iterator[str]:
+    """CSV with a header row, written even when the table is empty"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS[table])
+    writer.writeheader()
+    yield buffer.getvalue()
+    for row in EXPORT_TABLES[table](user_id):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue()
+
+def _next_chunk(lines: Iterator[str]) -> str:
+    return "".join(islice(lines, LINES_PER_CHUNK))
+
+async def stream_on_db_pool(lines: Iterator[str]):
+    """Drive a blocking line generator from the DB thread pool, one chunk at a time"""
+    try:
+        while True:
+            chunk = await run_db(_next_chunk, lines)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await run_db(lines.close)
+
+@router.get("")
+async def export_data(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    table: Optional[str] = Query(None, pattern="^(categories|goals|checkins)$"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream the current user's data as NDJSON (all tables, or one) or CSV (one table).
+    Rows are read a page at a time, each on its own pooled connection, so
+    memory use does not grow with history size and slow downloads don't
+    hold connections.
+    """
+    user_id = current_user['user_id']
+    
+    if format == "csv":
+        if table is None:
+            raise HTTPException(status_code=400, detail="CSV export requires a table")
+        lines = csv_lines(user_id, table)
+        media_type = "text/csv"
+        filename = f"365withme-{table}.csv"
+    else:
+        lines = ndjson_lines(user_id, [table] if table else list(EXPORT_TABLES))
+        media_type = "application/x-ndjson"
+        filename = f"365withme-{table or 'export'}.ndjson"
+    
+    return StreamingResponse(
+        stream_on_db_pool(lines),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
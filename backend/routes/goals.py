@@ -1,34 +1,35 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
 from models import Goal, GoalCreate, GoalUpdate
 from repositories.goal_repository import GoalRepository
-from dependencies import get_current_user
+from concurrency import run_db
+from dependencies import conditional_get, get_current_user
 from typing import List
 
 router = APIRouter(prefix="/goals", tags=["goals"])
 
-@router.get("", response_model=List[Goal])
+@router.get("", response_model=List[Goal], dependencies=[Depends(conditional_get)])
 async def get_goals(
     include_inactive: bool = Query(False),
     current_user: dict = Depends(get_current_user)
 ):
     """Get all goals for the current user"""
-    return GoalRepository.get_all(current_user['user_id'], include_inactive)
+    return await run_db(GoalRepository.get_all, current_user['user_id'], include_inactive)
 
-@router.get("/category/{category_id}", response_model=List[Goal])
+@router.get("/category/{category_id}", response_model=List[Goal], dependencies=[Depends(conditional_get)])
 async def get_goals_by_category(
     category_id: int, 
     current_user: dict = Depends(get_current_user)
 ):
     """Get goals by category for the current user"""
-    return GoalRepository.get_by_category(category_id, current_user['user_id'])
+    return await run_db(GoalRepository.get_by_category, category_id, current_user['user_id'])
 
-@router.get("/{goal_id}", response_model=Goal)
+@router.get("/{goal_id}", response_model=Goal, dependencies=[Depends(conditional_get)])
 async def get_goal(
     goal_id: int, 
     current_user: dict = Depends(get_current_user)
 ):
     """Get a specific goal (user must own it)"""
-    goal = GoalRepository.get_by_id(goal_id, current_user['user_id'])
+    goal = await run_db(GoalRepository.get_by_id, goal_id, current_user['user_id'])
     if not goal:
         raise HTTPException(status_code=404, detail="Goal not found")
     return goal
@@ -39,7 +40,7 @@ async def create_goal(
     current_user: dict = Depends(get_current_user)
 ):
     """Create a new goal for the current user"""
-    return GoalRepository.create(goal, current_user['user_id'])
+    return await run_db(GoalRepository.create, goal, current_user['user_id'])
 
 @router.put("/{goal_id}", response_model=Goal)
 async def update_goal(
@@ -48,7 +49,10 @@ async def update_goal(
     current_user: dict = Depends(get_current_user)
 ):
     """Update a goal (user must own it)"""
-    updated = GoalRepository.update(goal_id, goal, current_user['user_id'])
+    try:
+        updated = await run_db(GoalRepository.update, goal_id, goal, current_user['user_id'])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not updated:
         raise HTTPException(status_code=404, detail="Goal not found")
     return updated
@@ -59,5 +63,5 @@ async def delete_goal(
     current_user: dict = Depends(get_current_user)
 ):
     """Delete a goal (user must own it)"""
-    if not GoalRepository.delete(goal_id, current_user['user_id']):
+    if not await run_db(GoalRepository.delete, goal_id, current_user['user_id']):
         raise HTTPException(status_code=404, detail="Goal not found")
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Query, Depends, Request
+from services.import_service import ImportService
+from concurrency import run_db
+from dependencies import get_current_user
+import io
+import tempfile
+
+router = APIRouter(prefix="/import", tags=["import"])
+
+# Request bodies larger than this are spooled to disk instead of memory
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+def _import_stream(user_id: int, spool, fmt: str) -> dict:
+    stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+    try:
+        return ImportService.import_checkins(user_id, ImportService.read_records(stream, fmt))
+    finally:
+        stream.close()
+
+@router.post("")
+async def import_checkins(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Import historical check-ins from a raw CSV or NDJSON request body.
+    Rows name their goal by goal_id or by title (goal, with optional category,
+    frequency and target_value used when the goal has to be created).
+    Returns counts plus per-line errors.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    
+    return await run_db(_import_stream, current_user['user_id'], spool, format)
@@ -1,55 +1,125 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Path, Query, Depends
 from services.progress_service import ProgressService
-from dependencies import get_current_user
+from services import analytics
+from concurrency import run_db
+from dependencies import conditional_get, get_current_user
+from datetime import date
 from typing import Optional
 
 router = APIRouter(prefix="/progress", tags=["progress"])
 
-@router.get("/by-frequency")
+# Any day inside the period to report on; defaults to today
+PERIOD_DAY = Query(None, description="Report the period containing this date (YYYY-MM-DD)")
+
+@router.get("/by-frequency", dependencies=[Depends(conditional_get)])
 async def get_progress_by_frequency(
-    frequency: Optional[str] = Query(None),
+    frequency: Optional[str] = Query(None, pattern="^(daily|weekly|monthly|yearly|custom)$"),
+    on: Optional[date] = PERIOD_DAY,
     current_user: dict = Depends(get_current_user)
 ):
     """
     Get progress for goals grouped by frequency for the current user.
-    Progress is calculated dynamically within current time windows.
+    Progress is calculated dynamically within the current time windows,
+    or the windows containing `on`.
     """
-    return ProgressService.get_progress_by_frequency(
+    return await run_db(
+        ProgressService.get_progress_by_frequency,
         current_user['user_id'], 
-        frequency
+        frequency,
+        on
     )
 
-@router.get("/goal/{goal_id}")
+@router.get("/goal/{goal_id}", dependencies=[Depends(conditional_get)])
 async def get_goal_progress(
     goal_id: int, 
+    on: Optional[date] = PERIOD_DAY,
     current_user: dict = Depends(get_current_user)
 ):
     """
     Get current progress for a specific goal (user must own it).
-    Progress is calculated dynamically based on goal's frequency.
+    Progress is calculated dynamically based on goal's frequency,
+    for the period containing `on` when given.
     """
-    progress = ProgressService.get_goal_progress(goal_id, current_user['user_id'])
+    progress = await run_db(ProgressService.get_goal_progress, goal_id, current_user['user_id'], on)
     if not progress:
         raise HTTPException(status_code=404, detail="Goal not found")
     return progress
 
-@router.get("/calendar/{year}")
+# Same years as the year-grid path parameter (1..9998)
+HISTORY_MIN_DATE = date(1, 1, 1)
+HISTORY_MAX_DATE = date(9998, 12, 31)
+
+@router.get("/goal/{goal_id}/history", dependencies=[Depends(conditional_get)])
+async def get_goal_history(
+    goal_id: int,
+    period: Optional[str] = Query(None, pattern="^(day|week|month)$"),
+    start: Optional[date] = Query(None, ge=HISTORY_MIN_DATE, le=HISTORY_MAX_DATE,
+                                  description="First day of the range (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, ge=HISTORY_MIN_DATE, le=HISTORY_MAX_DATE,
+                                description="Last day of the range (YYYY-MM-DD)"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get a goal's totals per day, week or month with hit/miss flags (user must own it).
+    Defaults to the goal's own frequency from January 1st through today.
+    """
+    try:
+        history = await run_db(
+            ProgressService.get_goal_history, goal_id, current_user['user_id'], period, start, end
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not history:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    return history
+
+CALENDAR_MODE = Query('count', pattern="^(count|value|goals)$")
+
+@router.get("/calendar/{year}", dependencies=[Depends(conditional_get)])
 async def get_year_calendar(
     year: int, 
+    mode: str = CALENDAR_MODE,
     current_user: dict = Depends(get_current_user)
 ):
     """
     Get yearly calendar view for the current user.
-    Returns check-in counts for each day of the year.
+    Returns check-in counts for each day of the year by default;
+    mode=value sums check-in values and mode=goals breaks each day down per goal.
     """
-    return ProgressService.get_year_calendar(year, current_user['user_id'])
+    return await run_db(ProgressService.get_year_calendar, year, current_user['user_id'], mode)
 
-@router.get("/calendar")
-async def get_current_year_calendar(current_user: dict = Depends(get_current_user)):
+@router.get("/calendar", dependencies=[Depends(conditional_get)])
+async def get_current_year_calendar(
+    mode: str = CALENDAR_MODE,
+    current_user: dict = Depends(get_current_user)
+):
     """Get yearly calendar for current year for the current user"""
-    return ProgressService.get_year_calendar(None, current_user['user_id'])
+    return await run_db(ProgressService.get_year_calendar, None, current_user['user_id'], mode)
+
+@router.get("/year-grid/{year}", dependencies=[Depends(conditional_get)])
+async def get_year_grid(
+    year: int = Path(..., ge=1, le=9998),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get daily totals for every goal across a year for the current user.
+    Returns {goal_id: [one total per day]} starting at January 1st.
+    """
+    return await run_db(ProgressService.get_year_grid, year, current_user['user_id'])
+
+@router.get("/stats/{year}", dependencies=[Depends(conditional_get)])
+async def get_year_stats(
+    year: int = Path(..., ge=1, le=9998),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get yearly statistics for the current user: per-goal completion rate,
+    consistency, streaks, rolling averages and best week/month, plus
+    per-category aggregates and an overall summary.
+    """
+    return await run_db(analytics.get_year_stats, year, current_user['user_id'])
 
-@router.get("/day/{date}")
+@router.get("/day/{date}", dependencies=[Depends(conditional_get)])
 async def get_day_details(
     date: str, 
     current_user: dict = Depends(get_current_user)
@@ -58,4 +128,4 @@ async def get_day_details(
     Get all check-ins and reflections for a specific day for the current user.
     Used when clicking a day in the calendar view.
     """
-    return ProgressService.get_day_details(date, current_user['user_id'])
+    return await run_db(ProgressService.get_day_details, date, current_user['user_id'])
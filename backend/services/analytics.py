@@ -0,0 +1,293 @@
+"""Yearly statistics computed with NumPy.
+
+A user's year is loaded from the daily rollup into a goals x days matrix
+of totals, and every metric is an array operation over that matrix, so
+the cost grows with goals x days rather than with Python-level loops
+over check-ins.
+"""
+import numpy as np
+from cache import cached_per_user
+from repositories.category_repository import CategoryRepository
+from repositories.checkin_repository import CheckInRepository
+from repositories.goal_repository import GoalRepository
+from services import periods
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+# Trailing windows (in days) reported as rolling averages
+ROLLING_WINDOWS = (7, 30)
+
+# Best stretch of consecutive days reported per goal
+BEST_WINDOW = 7
+
+
+def load_year(year: int, user_id: int) -> Tuple[List[dict], np.ndarray]:
+    """Goals (sorted by id) and their goals x days matrix of daily totals.
+
+    Covers active goals and inactive ones with check-ins in `year`.
+    """
+    days = (date(year + 1, 1, 1) - date(year, 1, 1)).days
+    rows = np.array(CheckInRepository.get_year_daily_totals(year, user_id), dtype=np.float64).reshape(-1, 3)
+    goal_ids = rows[:, 0].astype(np.int64)
+    with_data = set(np.unique(goal_ids).tolist())
+
+    goals = [
+        goal for goal in GoalRepository.iter_all(user_id)
+        if goal['is_active'] or goal['id'] in with_data
+    ]
+    ids = np.array([goal['id'] for goal in goals], dtype=np.int64)
+    totals = np.zeros((len(goals), days))
+    if len(ids) and len(rows):
+        index = np.minimum(np.searchsorted(ids, goal_ids), len(ids) - 1)
+        day = rows[:, 1].astype(np.int64)
+        known = (ids[index] == goal_ids) & (day >= 0) & (day < days)
+        # Dates like 2026-02-30 land on the same day as 2026-03-02, so add
+        np.add.at(totals, (index[known], day[known]), rows[known, 2])
+    return goals, totals
+
+
+def _windows(goals: List[dict], totals: np.ndarray, year: int, elapsed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-goal [lo, hi) range of days that count.
+
+    Custom goals count their own dates; other goals count from creation
+    (or their first check-in, if earlier) through today.
+    """
+    jan1 = date(year, 1, 1)
+    days = totals.shape[1]
+    checked_in = totals > 0
+    first_checkin = np.where(checked_in.any(axis=1), checked_in.argmax(axis=1), days)
+    lo = np.zeros(len(goals), dtype=np.int64)
+    hi = np.full(len(goals), elapsed, dtype=np.int64)
+    for i, goal in enumerate(goals):
+        if goal['frequency'] == 'custom':
+            start, end = periods.custom_range(goal.get('start_date'), goal.get('end_date'))
+            hi[i] = min(max((end - jan1).days + 1, 0), elapsed)
+        else:
+            start = date.fromisoformat(goal['created_at'][:10])
+        lo[i] = min(max((start - jan1).days, 0), days)
+        if goal['frequency'] != 'custom':
+            lo[i] = min(lo[i], first_checkin[i])
+    return lo, np.maximum(hi, lo)
+
+
+def _runs(active: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(row, start, end) of every run of consecutive True days, end exclusive"""
+    padded = np.zeros((active.shape[0], active.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = active
+    edges = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return rows, starts, ends
+
+
+def _streaks(active: np.ndarray, hi: np.ndarray, today_index: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Longest and current run of active days per row.
+
+    A current streak ends on the last counted day, or the day before it
+    when that day is today and has no check-ins yet.
+    """
+    rows, starts, ends = _runs(active)
+    lengths = ends - starts
+    longest = np.zeros(active.shape[0], dtype=np.int64)
+    np.maximum.at(longest, rows, lengths)
+
+    last = hi[rows]
+    ongoing = (ends == last) | ((ends == last - 1) & (last - 1 == today_index))
+    current = np.zeros(active.shape[0], dtype=np.int64)
+    current[rows[ongoing]] = lengths[ongoing]
+    return longest, current
+
+
+def _period_results(goals: List[dict], values: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+                    year: int, today: date) -> Tuple[np.ndarray, np.ndarray]:
+    """Hit and missed periods per goal within the year.
+
+    Calendar periods are clipped to the year and summed with reduceat, one
+    frequency at a time. Only periods overlapping a goal's counted days
+    are measured: hit when their total reaches the target and missed once
+    they ended short of it.
+    """
+    jan1, dec31 = date(year, 1, 1), date(year, 12, 31)
+    frequencies = np.array([goal['frequency'] for goal in goals])
+    targets = np.array([goal['target_value'] for goal in goals], dtype=np.float64)
+    hits = np.zeros(len(goals), dtype=np.int64)
+    misses = np.zeros(len(goals), dtype=np.int64)
+
+    for frequency in np.unique(frequencies).tolist():
+        members = np.flatnonzero(frequencies == frequency)
+        target = targets[members][:, None]
+        if frequency == 'custom':
+            sums = values[members].sum(axis=1)[:, None]
+            started = (hi[members] > lo[members])[:, None]
+            ended = np.array([
+                periods.custom_range(goals[i].get('start_date'), goals[i].get('end_date'))[1] < today
+                for i in members
+            ])[:, None]
+        else:
+            calendar = periods.periods_between(frequency, jan1, dec31)
+            starts = np.array([(max(start, jan1) - jan1).days for _, start, _ in calendar])
+            ends = np.array([(end - jan1).days for _, _, end in calendar])
+            sums = np.add.reduceat(values[members], starts, axis=1)
+            # Periods overlapping the goal's counted days, which end today
+            started = (np.maximum(starts[None, :], lo[members][:, None])
+                       < np.minimum(ends[None, :] + 1, hi[members][:, None]))
+            ended = np.array([end < today for _, _, end in calendar])[None, :]
+        hit = (sums >= target) & started
+        hits[members] = hit.sum(axis=1)
+        misses[members] = (~hit & started & ended).sum(axis=1)
+    return hits, misses
+
+
+def _rolling_means(values: np.ndarray, lo: np.ndarray, hi: np.ndarray, window: int) -> np.ndarray:
+    """Mean daily total over the last `window` counted days of each row"""
+    cumulative = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(values, axis=1, out=cumulative[:, 1:])
+    first = np.maximum(lo, hi - window)
+    rows = np.arange(values.shape[0])
+    return _ratio(cumulative[rows, hi] - cumulative[rows, first], hi - first)
+
+
+def _best_windows(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Start day and total of the best `window`-day stretch of each row"""
+    cumulative = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(values, axis=1, out=cumulative[:, 1:])
+    sums = cumulative[:, window:] - cumulative[:, :-window]
+    starts = sums.argmax(axis=1)
+    return starts, sums[np.arange(values.shape[0]), starts]
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise division with NaN where the denominator is zero"""
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.full(denominator.shape, np.nan), where=denominator > 0)
+
+
+def _floats(array: np.ndarray, digits: int = 4) -> List[Optional[float]]:
+    return [None if np.isnan(value) else value for value in np.round(np.atleast_1d(array), digits).tolist()]
+
+
+@cached_per_user('stats')
+def get_year_stats(year: int, user_id: int) -> dict:
+    """Completion, consistency, rolling averages and best periods for a user's year.
+
+    Metrics cover January 1st through today (the whole year once it is
+    over), and a custom goal's own dates. Ratios are None when nothing
+    could be measured yet.
+    """
+    jan1 = date(year, 1, 1)
+    today = date.today()
+    goals, totals = load_year(year, user_id)
+    count, days = totals.shape
+    today_index = (today - jan1).days
+    elapsed = min(max(today_index + 1, 0), days)
+
+    lo, hi = _windows(goals, totals, year, elapsed)
+    day_index = np.arange(days)
+    counted = (day_index >= lo[:, None]) & (day_index < hi[:, None])
+    values = np.where(counted, totals, 0.0)
+    active = values > 0
+
+    goal_totals = values.sum(axis=1)
+    active_days = active.sum(axis=1)
+    counted_days = hi - lo
+    longest, current = _streaks(active, hi, today_index)
+    hits, misses = _period_results(goals, values, lo, hi, year, today)
+    averages = {window: _rolling_means(values, lo, hi, window) for window in ROLLING_WINDOWS}
+
+    best_window = min(BEST_WINDOW, days)
+    best_starts, best_totals = _best_windows(values, best_window)
+    months = periods.periods_between('monthly', jan1, date(year, 12, 31))
+    month_sums = np.add.reduceat(values, [(start - jan1).days for _, start, _ in months], axis=1)
+    best_months = month_sums.argmax(axis=1)
+
+    goal_stats = []
+    for i, goal in enumerate(goals):
+        best_start = jan1 + timedelta(days=int(best_starts[i]))
+        goal_stats.append({
+            'goal_id': goal['id'],
+            'title': goal['title'],
+            'category_id': goal['category_id'],
+            'frequency': goal['frequency'],
+            'target_value': goal['target_value'],
+            'is_active': bool(goal['is_active']),
+            'total': goal_totals[i].item(),
+            'active_days': active_days[i].item(),
+            'counted_days': counted_days[i].item(),
+            'longest_streak': longest[i].item(),
+            'current_streak': current[i].item(),
+            'hits': hits[i].item(),
+            'misses': misses[i].item(),
+            'best_week': None if best_totals[i] <= 0 else {
+                'start': best_start.isoformat(),
+                'end': (best_start + timedelta(days=best_window - 1)).isoformat(),
+                'total': best_totals[i].item()
+            },
+            'best_month': None if month_sums[i, best_months[i]] <= 0 else {
+                'key': months[best_months[i]][0],
+                'total': month_sums[i, best_months[i]].item()
+            }
+        })
+    for name, column in (
+        ('completion_rate', _ratio(hits, hits + misses)),
+        ('consistency', _ratio(active_days, counted_days)),
+        *((f'average_{window}d', averages[window]) for window in ROLLING_WINDOWS)
+    ):
+        for stats, value in zip(goal_stats, _floats(column)):
+            stats[name] = value
+
+    # Goals x categories membership turns per-category sums into one matmul
+    categories = {category['id']: category['title'] for category in CategoryRepository.get_all(user_id)}
+    category_ids, membership = np.unique(
+        np.array([goal['category_id'] for goal in goals], dtype=np.int64), return_inverse=True
+    )
+    groups = np.zeros((len(category_ids), count))
+    groups[membership, np.arange(count)] = 1
+    group_active = (groups @ active) > 0
+    group_counted = (groups @ counted) > 0
+    group_hits = groups @ hits
+    group_misses = groups @ misses
+    group_active_days = group_active.sum(axis=1)
+    group_counted_days = group_counted.sum(axis=1)
+    group_consistency = _floats(_ratio(group_active_days, group_counted_days))
+    group_completion = _floats(_ratio(group_hits, group_hits + group_misses))
+    category_stats = [{
+        'category_id': category_id,
+        'title': categories.get(category_id),
+        'goals': int(groups[c].sum()),
+        'total': (groups[c] @ goal_totals).item(),
+        'active_days': group_active_days[c].item(),
+        'hits': int(group_hits[c]),
+        'misses': int(group_misses[c]),
+        'completion_rate': group_completion[c],
+        'consistency': group_consistency[c]
+    } for c, category_id in enumerate(category_ids.tolist())]
+
+    daily = values.sum(axis=0)[:elapsed]
+    any_active = active.any(axis=0)
+    any_counted = counted.any(axis=0)
+    overall_longest, overall_current = _streaks(any_active[None, :], np.array([elapsed]), today_index)
+    cumulative = np.concatenate(([0.0], np.cumsum(daily)))
+    window = np.minimum(np.arange(1, elapsed + 1), ROLLING_WINDOWS[0])
+    rolling = (cumulative[1:] - cumulative[np.arange(1, elapsed + 1) - window]) / np.maximum(window, 1)
+    total_hits, total_misses = int(hits.sum()), int(misses.sum())
+
+    return {
+        'year': year,
+        'start_date': jan1.isoformat(),
+        'days': days,
+        'elapsed_days': elapsed,
+        'summary': {
+            'goals': count,
+            'total': daily.sum().item(),
+            'active_days': int(any_active.sum()),
+            'consistency': _floats(_ratio(any_active.sum(), any_counted.sum()))[0],
+            'hits': total_hits,
+            'misses': total_misses,
+            'completion_rate': _floats(_ratio(total_hits, total_hits + total_misses))[0],
+            'longest_streak': overall_longest[0].item(),
+            'current_streak': overall_current[0].item(),
+            f'rolling_{ROLLING_WINDOWS[0]}d': _floats(rolling, 3)
+        },
+        'goals': goal_stats,
+        'categories': category_stats
+    }
@@ -0,0 +1,206 @@
+from database import get_db, run_write
+from cache import invalidate_user
+from models import CheckInImportRow, validation_error_message
+from repositories.checkin_repository import CheckInRepository
+from repositories.data_version_repository import DataVersionRepository
+from config import settings
+from pydantic import ValidationError
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+import csv
+import json
+
+MAX_REPORTED_ERRORS = 100
+
+class ImportService:
+    @staticmethod
+    def read_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+        """Yield (line number, record, parse error) from a CSV or NDJSON stream"""
+        if fmt == 'csv':
+            reader = csv.DictReader(stream)
+            for record in reader:
+                # Empty cells mean "use the default", not an empty value
+                yield reader.line_num, {k: v for k, v in record.items() if v not in ('', None)}, None
+            return
+        
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, "Expected a JSON object"
+                continue
+            yield line_number, record, None
+    
+    @staticmethod
+    def load_targets(user_id: int) -> Tuple[Dict[str, int], Dict[str, int], set]:
+        """Get the user's category title -> id, goal title -> id and owned goal ids"""
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, title FROM categories WHERE user_id = ? ORDER BY id", (user_id,))
+            categories = {}
+            for row in cursor.fetchall():
+                categories.setdefault(row['title'], row['id'])
+            
+            cursor.execute("""
+                SELECT id, title FROM goals WHERE user_id = ?
+                ORDER BY is_active DESC, id
+            """, (user_id,))
+            goals = {}
+            goal_ids = set()
+            for row in cursor.fetchall():
+                goals.setdefault(row['title'], row['id'])
+                goal_ids.add(row['id'])
+            return categories, goals, goal_ids
+    
+    @staticmethod
+    def _write_chunk(conn, user_id: int, rows: List[CheckInImportRow],
+                     categories: Dict[str, int], goals: Dict[str, int], goal_ids: set):
+        """Write job: create missing categories/goals, then insert the chunk's check-ins.
+
+        The lookup maps are only read here; newly created ids are returned
+        so the caller can merge them once the transaction has committed.
+        """
+        cursor = conn.cursor()
+        new_categories, new_goals = {}, {}
+        
+        # First row naming an unknown goal decides its category, frequency and target
+        goal_specs = {}
+        for row in rows:
+            if row.goal_id is None and row.goal not in goals:
+                goal_specs.setdefault(row.goal, row)
+        
+        missing_categories = sorted({
+            spec.category for spec in goal_specs.values() if spec.category not in categories
+        })
+        if missing_categories:
+            cursor.executemany("""
+                INSERT INTO categories (user_id, title) VALUES (?, ?)
+            """, [(user_id, title) for title in missing_categories])
+            placeholders = ", ".join("?" for _ in missing_categories)
+            cursor.execute(f"""
+                SELECT id, title FROM categories
+                WHERE user_id = ? AND title IN ({placeholders})
+                ORDER BY id DESC
+            """, [user_id, *missing_categories])
+            for row in cursor.fetchall():
+                new_categories.setdefault(row['title'], row['id'])
+        
+        if goal_specs:
+            cursor.executemany("""
+                INSERT INTO goals (user_id, title, category_id, frequency, target_value)
+                VALUES (?, ?, ?, ?, ?)
+            """, [
+                (user_id, title, categories.get(spec.category) or new_categories[spec.category],
+                 spec.frequency, spec.target_value)
+                for title, spec in goal_specs.items()
+            ])
+            titles = list(goal_specs)
+            placeholders = ", ".join("?" for _ in titles)
+            cursor.execute(f"""
+                SELECT id, title FROM goals
+                WHERE user_id = ? AND title IN ({placeholders})
+                ORDER BY id DESC
+            """, [user_id, *titles])
+            for row in cursor.fetchall():
+                new_goals.setdefault(row['title'], row['id'])
+        
+        checkins = []
+        rejected = []
+        for index, row in enumerate(rows):
+            if row.goal_id is not None:
+                goal_id = row.goal_id if row.goal_id in goal_ids else None
+            else:
+                goal_id = goals.get(row.goal) or new_goals.get(row.goal)
+            if goal_id is None:
+                rejected.append(index)
+                continue
+            checkins.append((user_id, goal_id, row.date, row.value, row.note))
+        
+        if checkins:
+            cursor.executemany("""
+                INSERT INTO checkins (user_id, goal_id, date, value, note)
+                VALUES (?, ?, ?, ?, ?)
+            """, checkins)
+            deltas = {}
+            for _, goal_id, day, value, _ in checkins:
+                total, count = deltas.get((goal_id, day), (0, 0))
+                deltas[(goal_id, day)] = (total + value, count + 1)
+            CheckInRepository.apply_rollup_deltas(
+                conn,
+                [(user_id, goal_id, day, total, count) for (goal_id, day), (total, count) in deltas.items()]
+            )
+        
+        if checkins or new_categories or new_goals:
+            DataVersionRepository.bump(conn, user_id)
+        return new_categories, new_goals, len(checkins), rejected
+    
+    @staticmethod
+    def import_checkins(
+        user_id: int,
+        records: Iterable[Tuple[int, Optional[dict], Optional[str]]],
+        chunk_size: Optional[int] = None,
+        on_progress: Optional[Callable[[dict], None]] = None
+    ) -> dict:
+        """Validate and insert records chunk by chunk, one transaction per chunk.
+
+        Goals and categories referenced by title are resolved in bulk and
+        created when missing. Returns a summary with per-line errors.
+        """
+        chunk_size = chunk_size or settings.import_chunk_size
+        categories, goals, goal_ids = ImportService.load_targets(user_id)
+        summary = {
+            'processed': 0,
+            'imported': 0,
+            'failed': 0,
+            'categories_created': 0,
+            'goals_created': 0,
+            'errors': []
+        }
+        
+        def fail(line_number: int, error: str):
+            summary['failed'] += 1
+            if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                summary['errors'].append({'line': line_number, 'error': error})
+        
+        records = iter(records)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            
+            rows, lines = [], []
+            for line_number, record, error in chunk:
+                if error is None:
+                    try:
+                        rows.append(CheckInImportRow.model_validate(record))
+                        lines.append(line_number)
+                        continue
+                    except ValidationError as e:
+                        error = validation_error_message(e)
+                fail(line_number, error)
+            
+            if rows:
+                new_categories, new_goals, imported, rejected = run_write(
+                    ImportService._write_chunk, user_id, rows, categories, goals, goal_ids
+                )
+                categories.update(new_categories)
+                goals.update(new_goals)
+                goal_ids.update(new_goals.values())
+                summary['categories_created'] += len(new_categories)
+                summary['goals_created'] += len(new_goals)
+                summary['imported'] += imported
+                for index in rejected:
+                    fail(lines[index], "Goal not found")
+            
+            summary['processed'] += len(chunk)
+            if on_progress:
+                on_progress(summary)
+        
+        invalidate_user(user_id)
+        return summary
@@ -0,0 +1,152 @@
+from config import settings
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
+
+FREQUENCIES = ('daily', 'weekly', 'monthly', 'yearly', 'custom')
+
+# Open ends of a custom goal without start/end dates
+ALL_TIME = (date.min, date.max)
+
+_CURRENT_LABELS = {
+    'daily': 'today',
+    'weekly': 'this week',
+    'monthly': 'this month',
+    'yearly': 'this year',
+    'custom': 'all time'
+}
+
+
+def week_start() -> int:
+    """First day of the week, 0 = Monday ... 6 = Sunday"""
+    return settings.week_start % 7
+
+
+def _shift(day: date, days: int) -> date:
+    """`day` moved by `days`, clamped to the representable date range"""
+    ordinal = day.toordinal() + days
+    return date.fromordinal(min(max(ordinal, ALL_TIME[0].toordinal()), ALL_TIME[1].toordinal()))
+
+
+@lru_cache(maxsize=4096)
+def _period_range(frequency: str, day: date, first_weekday: int) -> Tuple[date, date]:
+    # Periods at either end of the calendar are cut off at date.min/date.max
+    if frequency == 'daily':
+        return day, day
+    if frequency == 'weekly':
+        offset = (day.weekday() - first_weekday) % 7
+        return _shift(day, -offset), _shift(day, 6 - offset)
+    if frequency == 'monthly':
+        start = day.replace(day=1)
+        if start.month == 12:
+            return start, start.replace(day=31)
+        return start, start.replace(month=start.month + 1) - timedelta(days=1)
+    if frequency == 'yearly':
+        return day.replace(month=1, day=1), day.replace(month=12, day=31)
+    if frequency == 'custom':
+        return ALL_TIME
+    raise ValueError(f"Unknown frequency: {frequency}")
+
+
+def period_range(frequency: str, day: Optional[date] = None) -> Tuple[date, date]:
+    """Start and end of the `frequency` period containing `day` (default today).
+
+    Results are memoized per (frequency, day, week start). Custom goals have
+    no calendar period; see custom_range().
+    """
+    return _period_range(frequency, day or date.today(), week_start())
+
+
+def custom_range(start_date: Optional[str], end_date: Optional[str]) -> Tuple[date, date]:
+    """Window of a custom goal from its own start/end dates, open where unset"""
+    return (
+        date.fromisoformat(start_date) if start_date else ALL_TIME[0],
+        date.fromisoformat(end_date) if end_date else ALL_TIME[1]
+    )
+
+
+def goal_range(goal: dict, day: Optional[date] = None) -> Tuple[date, date]:
+    """Window a goal's progress is measured over for the period containing `day`"""
+    if goal['frequency'] == 'custom':
+        return custom_range(goal.get('start_date'), goal.get('end_date'))
+    return period_range(goal['frequency'], day)
+
+
+def period_key(frequency: str, start: date) -> str:
+    """Stable identifier of the period starting at `start`.
+
+    Weeks use ISO notation (2024-W07) when weeks start on Monday and the
+    start date otherwise.
+    """
+    if frequency == 'daily':
+        return start.isoformat()
+    if frequency == 'weekly':
+        if week_start() == 0:
+            iso_year, week, _ = start.isocalendar()
+            return f"{iso_year}-W{week:02d}"
+        return start.isoformat()
+    if frequency == 'monthly':
+        return start.strftime('%Y-%m')
+    if frequency == 'yearly':
+        return str(start.year)
+    return 'all'
+
+
+def period_label(frequency: str, start: date, end: date, today: Optional[date] = None) -> str:
+    """Human-readable label: 'this week' for the current period, else its dates"""
+    today = today or date.today()
+    if frequency == 'custom':
+        if (start, end) == ALL_TIME:
+            return _CURRENT_LABELS['custom']
+        first = 'the start' if start == ALL_TIME[0] else start.isoformat()
+        last = 'now' if end == ALL_TIME[1] else end.isoformat()
+        return f"{first} to {last}"
+    if start <= today <= end:
+        return _CURRENT_LABELS[frequency]
+    if frequency == 'daily':
+        return start.isoformat()
+    if frequency == 'weekly':
+        return f"week of {start.isoformat()}"
+    if frequency == 'monthly':
+        return start.strftime('%B %Y')
+    return str(start.year)
+
+
+def count_between(frequency: str, start: date, end: date) -> int:
+    """Number of `frequency` periods overlapping start..end, without listing them"""
+    if end < start:
+        return 0
+    if frequency == 'daily':
+        return (end - start).days + 1
+    if frequency == 'weekly':
+        first = period_range('weekly', start)[0]
+        return (end - first).days // 7 + 1
+    if frequency == 'monthly':
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    if frequency == 'yearly':
+        return end.year - start.year + 1
+    raise ValueError(f"Unknown frequency: {frequency}")
+
+
+@lru_cache(maxsize=256)
+def _periods_between(frequency: str, start: date, end: date, first_weekday: int) -> Tuple[Tuple[str, date, date], ...]:
+    periods = []
+    day = start
+    while day <= end:
+        period_start, period_end = _period_range(frequency, day, first_weekday)
+        periods.append((period_key(frequency, period_start), period_start, period_end))
+        if period_end >= date.max:
+            break
+        day = period_end + timedelta(days=1)
+    return tuple(periods)
+
+
+def periods_between(frequency: str, start: date, end: date) -> Tuple[Tuple[str, date, date], ...]:
+    """Every (key, start, end) period of `frequency` overlapping start..end.
+
+    The calendar for a range is computed once and memoized, so repeated
+    history queries reuse it.
+    """
+    if frequency == 'custom':
+        raise ValueError("Custom goals have no calendar periods")
+    return _periods_between(frequency, start, end, week_start())
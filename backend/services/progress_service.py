@@ -1,103 +1,86 @@
+from cache import cached_per_user
 from database import get_db
 from repositories.checkin_repository import CheckInRepository
 from repositories.goal_repository import GoalRepository
-from datetime import date, timedelta
+from services import periods
+from datetime import date
 from typing import List, Tuple, Optional
 
+# History granularity -> matching goal frequency
+HISTORY_PERIODS = {'day': 'daily', 'week': 'weekly', 'month': 'monthly'}
+
+# Longest series one history request may return (about ten years of days)
+MAX_HISTORY_PERIODS = 3700
+
 class ProgressService:
     @staticmethod
-    def get_current_period_dates(frequency: str) -> Tuple[date, date]:
-        """Get start and end dates for the current period based on frequency"""
-        today = date.today()
-        
-        if frequency == 'daily':
-            return today, today
-        elif frequency == 'weekly':
-            start = today - timedelta(days=today.weekday())
-            end = start + timedelta(days=6)
-            return start, end
-        elif frequency == 'monthly':
-            start = today.replace(day=1)
-            if today.month == 12:
-                end = today.replace(day=31)
-            else:
-                end = (today.replace(month=today.month + 1, day=1) - timedelta(days=1))
-            return start, end
-        elif frequency == 'yearly':
-            start = today.replace(month=1, day=1)
-            end = today.replace(month=12, day=31)
-            return start, end
-        else:  # custom
-            return date(2020, 1, 1), date(2099, 12, 31)
+    def get_current_period_dates(frequency: str, on: Optional[date] = None) -> Tuple[date, date]:
+        """Get start and end dates of the period containing `on` (default today)"""
+        return periods.period_range(frequency, on)
     
     @staticmethod
-    def get_period_label(frequency: str) -> str:
+    def get_period_label(frequency: str, on: Optional[date] = None) -> str:
         """Get human-readable label for the period"""
-        labels = {
-            'daily': 'today',
-            'weekly': 'this week',
-            'monthly': 'this month',
-            'yearly': 'this year',
-            'custom': 'all time'
+        return periods.period_label(frequency, *periods.period_range(frequency, on))
+    
+    @staticmethod
+    def _period_fields(frequency: str, start: date, end: date) -> dict:
+        return {
+            'period_label': periods.period_label(frequency, start, end),
+            'period_start': None if start == periods.ALL_TIME[0] else start.isoformat(),
+            'period_end': None if end == periods.ALL_TIME[1] else end.isoformat()
         }
-        return labels.get(frequency, '')
     
     @staticmethod
-    def get_progress_by_frequency(user_id: int, frequency: str = None) -> dict:
-        """Get progress for goals grouped by frequency for a specific user"""
-        frequencies = [frequency] if frequency else ['daily', 'weekly', 'monthly', 'yearly', 'custom']
-        result = {}
+    @cached_per_user('by-frequency')
+    def get_progress_by_frequency(user_id: int, frequency: str = None, on: Optional[date] = None) -> dict:
+        """Get progress for goals grouped by frequency for a specific user.
+        
+        Each goal is measured over its period containing `on` (default today);
+        custom goals over their own start/end dates.
+        """
+        frequencies = [frequency] if frequency else list(periods.FREQUENCIES)
         
+        windows = {}
         for freq in frequencies:
-            goals = GoalRepository.get_by_frequency(freq, user_id)
-            if not goals:
-                continue
-            
-            start_date, end_date = ProgressService.get_current_period_dates(freq)
-            period_label = ProgressService.get_period_label(freq)
-            
-            goal_progress = []
-            for goal in goals:
-                # Calculate progress dynamically within time window
-                progress = CheckInRepository.get_progress_in_window(
-                    goal['id'],
-                    start_date.isoformat(),
-                    end_date.isoformat(),
-                    user_id
-                )
-                
-                target = goal['target_value']
-                percentage = (progress / target * 100) if target > 0 else 0
-                
-                goal_progress.append({
-                    'goal_id': goal['id'],
-                    'title': goal['title'],
-                    'category_id': goal['category_id'],
-                    'current_value': progress,
-                    'target_value': target,
-                    'percentage': min(percentage, 100),
-                    'period_label': period_label
-                })
+            start_date, end_date = ProgressService.get_current_period_dates(freq, on)
+            windows[freq] = (start_date.isoformat(), end_date.isoformat())
+        
+        # One grouped query computes every active goal's total in its window
+        grouped = {}
+        for goal in CheckInRepository.get_active_goal_progress(windows, user_id):
+            progress = goal['total']
+            target = goal['target_value']
+            percentage = (progress / target * 100) if target > 0 else 0
             
-            result[freq] = goal_progress
+            grouped.setdefault(goal['frequency'], []).append({
+                'goal_id': goal['id'],
+                'title': goal['title'],
+                'category_id': goal['category_id'],
+                'current_value': progress,
+                'target_value': target,
+                'percentage': min(percentage, 100),
+                **ProgressService._period_fields(goal['frequency'], *periods.goal_range(goal, on))
+            })
         
-        return result
+        return {freq: grouped[freq] for freq in frequencies if freq in grouped}
     
     @staticmethod
-    def get_goal_progress(goal_id: int, user_id: int) -> Optional[dict]:
-        """Get current progress for a specific goal owned by user"""
+    @cached_per_user('goal')
+    def get_goal_progress(goal_id: int, user_id: int, on: Optional[date] = None) -> Optional[dict]:
+        """Get progress for a specific goal owned by user in the period containing `on`"""
         goal = GoalRepository.get_by_id(goal_id, user_id)
         if not goal:
             return None
         
         frequency = goal['frequency']
-        start_date, end_date = ProgressService.get_current_period_dates(frequency)
+        start_date, end_date = periods.goal_range(goal, on)
         
         # Calculate progress dynamically
         progress = CheckInRepository.get_progress_in_window(
             goal_id,
-            start_date,
-            end_date,
+            start_date.isoformat(),
+            end_date.isoformat(),
             user_id
         )
         
@@ -111,36 +94,155 @@ class ProgressService:
             'current_value': progress,
             'target_value': target,
             'percentage': min(percentage, 100),
-            'period_label': ProgressService.get_period_label(frequency)
+            **ProgressService._period_fields(frequency, start_date, end_date)
         }
     
     @staticmethod
-    def get_year_calendar(year: Optional[int], user_id: int) -> dict:
-        """Get year calendar view with check-in counts for a user"""
+    @cached_per_user('goal-history')
+    def get_goal_history(goal_id: int, user_id: int, period: Optional[str] = None,
+                         start: Optional[date] = None, end: Optional[date] = None) -> Optional[dict]:
+        """Get per-period totals and hit/miss flags for a goal owned by user.
+        
+        `period` is day, week or month and defaults to the goal's own
+        frequency (month for yearly and custom goals). The range defaults to
+        January 1st of `end`'s year (or a custom goal's start) through `end`
+        or today, just the first period of a goal starting later, and is
+        widened to whole periods. A period is hit when its total reaches the
+        goal's target for that period and missed once it ended short;
+        periods in progress, not started, ended before the goal was created
+        (or first checked in, if earlier) or without a comparable target
+        have hit None.
+        """
+        goal = GoalRepository.get_by_id(goal_id, user_id)
+        if not goal:
+            return None
+        
+        frequency = goal['frequency']
+        if period is None:
+            period = next((name for name, freq in HISTORY_PERIODS.items() if freq == frequency), 'month')
+        granularity = HISTORY_PERIODS[period]
+        
+        today = date.today()
+        default_start = (end or today).replace(month=1, day=1)
+        if frequency == 'custom' and goal.get('start_date'):
+            default_start = date.fromisoformat(goal['start_date'])
+        # Defaults give way to an explicit bound (or a custom goal starting later)
+        if start is None:
+            start = default_start if end is None else min(default_start, end)
+        if end is None:
+            end = max(today, start)
+        if end < start:
+            raise ValueError("end must not be before start")
+        
+        # Counted arithmetically so oversized ranges are refused before listing them
+        if periods.count_between(granularity, start, end) > MAX_HISTORY_PERIODS:
+            raise ValueError(f"Range covers more than {MAX_HISTORY_PERIODS} periods")
+        buckets = periods.periods_between(granularity, start, end)
+        first, last = buckets[0][1], buckets[-1][2]
+        
+        totals = {
+            row['period_start']: row
+            for row in CheckInRepository.get_period_totals(
+                goal_id, user_id, period, first.isoformat(), last.isoformat(), periods.week_start()
+            )
+        }
+        
+        tracked_from = date.fromisoformat(goal['created_at'][:10])
+        first_checkin = CheckInRepository.get_first_date(goal_id, user_id)
+        if first_checkin is not None:
+            tracked_from = min(tracked_from, date.fromisoformat(first_checkin))
+        
+        target = goal['target_value']
+        series = []
+        hits = misses = 0
+        for key, period_start, period_end in buckets:
+            row = totals.get(period_start.isoformat())
+            total = row['total'] if row else 0
+            
+            if granularity == frequency:
+                period_target = target
+            elif frequency == 'daily':
+                period_target = target * ((period_end - period_start).days + 1)
+            else:
+                period_target = None
+            
+            hit = None
+            if period_target is not None and tracked_from <= period_end and period_start <= today:
+                if total >= period_target:
+                    hit = True
+                    hits += 1
+                elif period_end < today:
+                    hit = False
+                    misses += 1
+            
+            series.append({
+                'key': key,
+                'start': period_start.isoformat(),
+                'end': period_end.isoformat(),
+                'total': total,
+                'checkins': row['checkins'] if row else 0,
+                'target': period_target,
+                'hit': hit
+            })
+        
+        return {
+            'goal_id': goal_id,
+            'goal_title': goal['title'],
+            'frequency': frequency,
+            'period': period,
+            'start_date': first.isoformat(),
+            'end_date': last.isoformat(),
+            'target_value': target,
+            'hits': hits,
+            'misses': misses,
+            'periods': series
+        }
+    
+    @staticmethod
+    @cached_per_user('calendar')
+    def get_year_calendar(year: Optional[int], user_id: int, mode: str = 'count') -> dict:
+        """Get year calendar view with per-day check-in totals for a user"""
         if year is None:
             year = date.today().year
         
-        year_summary = CheckInRepository.get_year_summary(year, user_id)
+        year_summary = CheckInRepository.get_year_summary(year, user_id, mode)
         
         return {
             'year': year,
+            'mode': mode,
             'calendar': year_summary
         }
     
     @staticmethod
+    @cached_per_user('year-grid')
+    def get_year_grid(year: int, user_id: int) -> dict:
+        """Get a {goal_id: [daily totals]} matrix covering every day of the year"""
+        start = date(year, 1, 1)
+        days = (date(year + 1, 1, 1) - start).days
+        
+        grid = {}
+        for row in CheckInRepository.get_year_grid(year, user_id):
+            totals = grid.setdefault(row['goal_id'], [0] * days)
+            # Stored dates are free-form; ones SQLite cannot place are skipped
+            if row['day'] is not None and 0 <= row['day'] < days:
+                totals[row['day']] += row['total']
+        
+        return {
+            'year': year,
+            'start_date': start.isoformat(),
+            'days': days,
+            'goals': grid
+        }
+    
+    @staticmethod
+    @cached_per_user('day')
     def get_day_details(check_date: str, user_id: int) -> dict:
         """Get all check-ins and reflections for a specific day for a user"""
-        checkins = CheckInRepository.get_by_date(check_date, user_id)
-        
-        # Enrich with goal information
-        enriched_checkins = []
-        for checkin in checkins:
-            goal = GoalRepository.get_by_id(checkin['goal_id'], user_id)
-            enriched_checkins.append({
-                **checkin,
-                'goal_title': goal['title'] if goal else 'Unknown Goal',
-                'goal_frequency': goal['frequency'] if goal else None
-            })
+        # Goal and category info come from the same joined query
+        enriched_checkins = CheckInRepository.get_day_details(check_date, user_id)
+        for checkin in enriched_checkins:
+            if checkin['goal_title'] is None:
+                checkin['goal_title'] = 'Unknown Goal'
         
         return {
             'date': check_date,
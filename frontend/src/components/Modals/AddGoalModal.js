@@ -5,7 +5,9 @@ const AddGoalModal = ({ categories, selectedCategory, onSubmit, onClose }) => {
     title: '',
     category_id: selectedCategory?.id || '',
     frequency: 'daily',
-    target_value: 1
+    target_value: 1,
+    start_date: null,
+    end_date: null
   });
 
   const handleSubmit = () => {
@@ -88,6 +90,36 @@ const AddGoalModal = ({ categories, selectedCategory, onSubmit, onClose }) => {
             </div>
           )}
 
+          {formData.frequency === 'custom' && (
+            <div>
+              <div className="grid grid-cols-2 gap-3">
+                <div>
+                  <label className="block text-sm font-semibold text-gray-700 mb-2">
+                    Start Date
+                  </label>
+                  <input
+                    type="date"
+                    value={formData.start_date || ''}
+                    onChange={(e) => setFormData({...formData, start_date: e.target.value || null})}
+                    className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-indigo-500 focus:border-transparent"
+                  />
+                </div>
+                <div>
+                  <label className="block text-sm font-semibold text-gray-700 mb-2">
+                    End Date
+                  </label>
+                  <input
+                    type="date"
+                    value={formData.end_date || ''}
+                    onChange={(e) => setFormData({...formData, end_date: e.target.value || null})}
+                    className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-indigo-500 focus:border-transparent"
+                  />
+                </div>
+              </div>
+              <p className="text-xs text-gray-500 mt-1">Leave empty to count all check-ins</p>
+            </div>
+          )}
+
           <div className="flex gap-3 pt-4">
             <button
               onClick={onClose}
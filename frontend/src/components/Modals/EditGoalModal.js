@@ -5,7 +5,9 @@ const EditGoalModal = ({ goal, categories, onSubmit, onClose }) => {
     title: goal.title,
     category_id: goal.category_id,
     frequency: goal.frequency,
-    target_value: goal.target_value
+    target_value: goal.target_value,
+    start_date: goal.start_date || null,
+    end_date: goal.end_date || null
   });
 
   const handleSubmit = () => {
@@ -86,6 +88,36 @@ const EditGoalModal = ({ goal, categories, onSubmit, onClose }) => {
             </div>
           )}
 
+          {formData.frequency === 'custom' && (
+            <div>
+              <div className="grid grid-cols-2 gap-3">
+                <div>
+                  <label className="block text-sm font-semibold text-gray-700 mb-2">
+                    Start Date
+                  </label>
+                  <input
+                    type="date"
+                    value={formData.start_date || ''}
+                    onChange={(e) => setFormData({...formData, start_date: e.target.value || null})}
+                    className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-indigo-500 focus:border-transparent"
+                  />
+                </div>
+                <div>
+                  <label className="block text-sm font-semibold text-gray-700 mb-2">
+                    End Date
+                  </label>
+                  <input
+                    type="date"
+                    value={formData.end_date || ''}
+                    onChange={(e) => setFormData({...formData, end_date: e.target.value || null})}
+                    className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-indigo-500 focus:border-transparent"
+                  />
+                </div>
+              </div>
+              <p className="text-xs text-gray-500 mt-1">Leave empty to count all check-ins</p>
+            </div>
+          )}
+
           <div className="flex gap-3 pt-4">
             <button
               onClick={onClose}
@@ -23,35 +23,26 @@ const YearProgressView = ({ goals, categories }) => {
     try {
       const progressData = {};
       
-      // Import checkinService to use authenticated API
-      const { checkinService } = await import('../../services/checkinService');
+      // Import progressService to use authenticated API
+      const { progressService } = await import('../../services/progressService');
+      
+      // One request returns daily totals for every goal for the entire year
+      const grid = await progressService.getYearGrid(year);
+      const [startYear, startMonth, startDay] = grid.start_date.split('-').map(Number);
       
-      // Fetch check-ins for each goal for the entire year
       for (const goal of goals) {
-        const startDate = `${year}-01-01`;
-        const endDate = `${year}-12-31`;
+        const totals = grid.goals[goal.id] || [];
         
-        console.log(`Fetching check-ins for goal ${goal.id}: ${goal.title}`);
+        // Keep only days with progress, keyed by date
+        const byDate = {};
+        totals.forEach((total, dayIndex) => {
+          if (total > 0) {
+            const day = new Date(Date.UTC(startYear, startMonth - 1, startDay + dayIndex));
+            byDate[day.toISOString().split('T')[0]] = total;
+          }
+        });
         
-        try {
-          // Use the service which handles auth automatically
-          const checkins = await checkinService.getByGoal(goal.id, startDate, endDate);
-          console.log(`Goal ${goal.id} has ${checkins.length} check-ins`);
-          
-          // Group by date
-          const byDate = {};
-          checkins.forEach(checkin => {
-            if (!byDate[checkin.date]) {
-              byDate[checkin.date] = 0;
-            }
-            byDate[checkin.date] += checkin.value;
-          });
-          
-          progressData[goal.id] = byDate;
-        } catch (error) {
-          console.error(`Failed to fetch check-ins for goal ${goal.id}:`, error);
-          progressData[goal.id] = {};
-        }
+        progressData[goal.id] = byDate;
       }
       
       console.log('All progress data:', progressData);
@@ -15,6 +15,22 @@ export const progressService = {
     return apiService.get(`${API_ENDPOINTS.PROGRESS}/goal/${goalId}`);
   },
 
+  // Get yearly statistics (completion, consistency, streaks, best periods)
+  getYearStats: async (year) => {
+    return apiService.get(`${API_ENDPOINTS.PROGRESS}/stats/${year}`);
+  },
+
+  // Get per-period totals and hit/miss flags for a goal
+  getGoalHistory: async (goalId, { period, start, end } = {}) => {
+    let url = `${API_ENDPOINTS.PROGRESS}/goal/${goalId}/history`;
+    const params = [];
+    if (period) params.push(`period=${period}`);
+    if (start) params.push(`start=${start}`);
+    if (end) params.push(`end=${end}`);
+    if (params.length) url += `?${params.join('&')}`;
+    return apiService.get(url);
+  },
+
   // Get year calendar data
   getYearCalendar: async (year = null) => {
     const url = year 
@@ -23,6 +39,11 @@ export const progressService = {
     return apiService.get(url);
   },
 
+  // Get daily totals for every goal across a year ({ goals: { id: [totals] } })
+  getYearGrid: async (year) => {
+    return apiService.get(`${API_ENDPOINTS.PROGRESS}/year-grid/${year}`);
+  },
+
   // Get details for a specific day
   getDayDetails: async (date) => {
     return apiService.get(`${API_ENDPOINTS.PROGRESS}/day/${date}`);